@@ -0,0 +1,30 @@
+# api/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class LoginBackend(ModelBackend):
+    """
+    ModelBackend that loads the user's UserSession in the same query,
+    so LoginView can reuse the row without another lookup.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.select_related('user_token').get(
+                **{UserModel.USERNAME_FIELD: username}
+            )
+        except UserModel.DoesNotExist:
+            # Timing hujumlariga qarshi: parolni baribir hash qilamiz
+            UserModel().set_password(password)
+            return None
+        # check_password() hash eskirgan bo'lsa uni avtomatik yangilaydi
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
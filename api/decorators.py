@@ -1,40 +1,59 @@
 # api/decorators.py
 from functools import wraps
 from django.http import JsonResponse
-from django.utils.timezone import now
 from .models import UserSession
+from .services import signed_tokens
+from .services.activity import session_activity
+from .services.session_cache import session_cache
+from .utils import signed_tokens_enabled
+
+
+def _get_session(request):
+    """Token bo'yicha sessiyani topadi: (snapshot yoki claims, None) yoki (None, JsonResponse)."""
+    auth_header = (
+        request.headers.get('Authorization')
+        if hasattr(request, 'headers')
+        else request.META.get('HTTP_AUTHORIZATION')
+    )
+
+    # 1️⃣ Header yo‘qligini tekshirish
+    if not auth_header:
+        return None, JsonResponse({'detail': 'Authorization header missing'}, status=401)
+
+    # 2️⃣ Token formatini tekshirish <token>
+    token = auth_header.strip()
+
+    # Imzolangan token: bazaga murojaat qilmasdan tekshiriladi
+    if signed_tokens_enabled() and signed_tokens.is_signed_token(token):
+        claims = signed_tokens.verify(token)
+        if claims is None:
+            return None, JsonResponse({'detail': 'Invalid or expired token'}, status=401)
+        return claims, None
+
+    # 3️⃣ Tokenni keshdan, bo'lmasa bazadan izlash
+    snapshot = session_cache.get(token)
+    if snapshot is None:
+        version = session_cache.version()
+        session = UserSession.objects.filter(token=token).select_related('user').first()
+        if not session:
+            return None, JsonResponse({'detail': 'Invalid or expired token'}, status=401)
+        snapshot = session_cache.set(token, session, version)
+    return snapshot, None
 
 
 def user_required(view_func):
     """Decorator for normal authenticated users (based on custom token)."""
     @wraps(view_func)
     def wrapper(s, request, *args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        auth_header = (
-            request.headers.get('Authorization')
-            if hasattr(request, 'headers')
-            else request.META.get('HTTP_AUTHORIZATION')
-        )
-
-
-        # 1️⃣ Header yo‘qligini tekshirish
-        if not auth_header:
-            print(auth_header)
-            return JsonResponse({'detail': 'Authorization header missing'}, status=401)
-
-        # 2️⃣ Token formatini tekshirish <token>
-        token = auth_header.strip()
-
-        # 3️⃣ Tokenni bazadan izlash
-        session = UserSession.objects.filter(token=token).select_related('user').first()
-        if not session:
-            return JsonResponse({'detail': 'Invalid or expired token'}, status=401)
+        snapshot, error = _get_session(request)
+        if error is not None:
+            return error
 
         # 4️⃣ Qurilma va IP tekshirish (faqat bitta qurilmadan foydalanish uchun)
         current_device = request.headers.get('User-Agent', 'Unknown Device')
         # current_ip = request.META.get('REMOTE_ADDR')
 
-        if session.device_info != current_device:
+        if not snapshot.matches_device(current_device):
             return JsonResponse({'detail': 'Access denied: token is not valid for this device.'}, status=403)
 
         # 5️⃣ Token amal qilish muddati (agar kerak bo‘lsa)
@@ -43,43 +62,26 @@ def user_required(view_func):
         #     return JsonResponse({'detail': 'Token expired'}, status=401)
 
         # 6️⃣ request.user ni biriktirish
-        request.user = session.user
+        request.user = snapshot.build_user()
+        if snapshot.session_id is not None:
+            session_activity.touch(snapshot.session_id)
         return view_func(s, request, *args, **kwargs)
     return wrapper
 
 
 def admin_required(view_func):
     """Decorator for admin users only."""
-
-    """Decorator for normal authenticated users (based on custom token)."""
     @wraps(view_func)
     def wrapper(s, request, *args, **kwargs):
-        auth_header = request.headers.get('Authorization')
-        auth_header = (
-            request.headers.get('Authorization')
-            if hasattr(request, 'headers')
-            else request.META.get('HTTP_AUTHORIZATION')
-        )
-
-
-        # 1️⃣ Header yo‘qligini tekshirish
-        if not auth_header:
-            print(auth_header)
-            return JsonResponse({'detail': 'Authorization header missing'}, status=401)
-
-        # 2️⃣ Token formatini tekshirish <token>
-        token = auth_header.strip()
+        snapshot, error = _get_session(request)
+        if error is not None:
+            return error
 
-        # 3️⃣ Tokenni bazadan izlash
-        session = UserSession.objects.filter(token=token).select_related('user').first()
-        if not session:
-            return JsonResponse({'detail': 'Invalid or expired token'}, status=401)
-
-        request.user = session.user
+        request.user = snapshot.build_user()
         if not getattr(request.user, "is_staff", False) and getattr(request.user, "role", "").upper() != "ADMIN":
             return JsonResponse({'detail': 'Admin privileges required'}, status=403)
-        
-        session.updated_at = now()
-        session.save()
+
+        if snapshot.session_id is not None:
+            session_activity.touch(snapshot.session_id)
         return view_func(s, request, *args, **kwargs)
     return wrapper
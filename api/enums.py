@@ -10,3 +10,7 @@ class TestChoices(models.TextChoices):
     TICKET = 'TICKET', "Ticket"
     SETTEST = "SETTEST", "Settest"
 
+
+class PeriodChoices(models.TextChoices):
+    DAY = 'DAY', "Day"
+    HOUR = 'HOUR', "Hour"
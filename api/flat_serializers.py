@@ -0,0 +1,140 @@
+"""
+Flat read-only serializers for hot list endpoints.
+
+FlatSerializer compiles a DRF ModelSerializer's fields once into a plan
+(output name, model column, converter) and then turns .values_list() tuples
+straight into dicts. The output (keys, order and values) is the same as
+serializer.data, so the JSON renders byte for byte the same.
+"""
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.settings import api_settings
+
+
+class FlatSerializerError(TypeError):
+    pass
+
+
+# Bazadan kelgan qiymat DRF dagi bilan bir xil bo'lgan fieldlar
+IDENTITY_FIELDS = (
+    drf_fields.IntegerField,
+    drf_fields.CharField,
+    drf_fields.BooleanField,
+    drf_fields.ChoiceField,
+    drf_fields.JSONField,
+    drf_fields.ReadOnlyField,
+)
+
+
+# Converterlar: factory(request) -> convert(value); factory har bir many()/one() da bir marta chaqiriladi
+
+def _file_converter(field):
+    """ImageField/FileField: values() faqat fayl nomini beradi, url storage dan olinadi."""
+    storage = field.parent.Meta.model._meta.get_field(field.source).storage
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def factory(request):
+        def convert(name):
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+    return factory
+
+
+def _datetime_converter(field):
+    """ISO 8601 uchun DRF bilan bir xil natija, lekin timezone har qiymat uchun emas, bir marta olinadi."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return _representation_converter(field)
+
+    def factory(request):
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def convert(value):
+            if field_timezone is None or not timezone.is_aware(value):
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    return factory
+
+
+def _representation_converter(field):
+    return lambda request: field.to_representation
+
+
+class FlatSerializer:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        self.names, self.columns, self.converters = [], [], []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise FlatSerializerError(f"{serializer_class.__name__}.{name}: nested source is not supported")
+            model_field = model._meta.get_field(field.source)
+            if isinstance(field, relations.PrimaryKeyRelatedField) and not model_field.many_to_many:
+                column, converter = model_field.attname, None
+            elif isinstance(field, drf_fields.FileField):
+                column, converter = field.source, _file_converter(field)
+            elif isinstance(field, IDENTITY_FIELDS):
+                column, converter = field.source, None
+            elif isinstance(field, drf_fields.DateTimeField):
+                column, converter = field.source, _datetime_converter(field)
+            elif isinstance(field, (drf_fields.DateField, drf_fields.DecimalField,
+                                    drf_fields.FloatField, drf_fields.UUIDField)):
+                column, converter = field.source, _representation_converter(field)
+            else:
+                raise FlatSerializerError(
+                    f"{serializer_class.__name__}.{name}: {type(field).__name__} is not supported"
+                )
+            self.names.append(name)
+            self.columns.append(column)
+            self.converters.append(converter)
+
+    def many(self, queryset, request=None):
+        """serializer_class(queryset, many=True).data equivalent from one values_list() query."""
+        names = self.names
+        plan = [(i, factory(request)) for i, factory in enumerate(self.converters) if factory is not None]
+        data = []
+        for row in queryset.values_list(*self.columns):
+            if plan:
+                row = list(row)
+                for i, convert in plan:
+                    if row[i] is not None:
+                        row[i] = convert(row[i])
+            data.append(dict(zip(names, row)))
+        return data
+
+    def one(self, instance, request=None):
+        """serializer_class(instance).data equivalent from an already loaded instance (None for None)."""
+        if instance is None:
+            # Masalan o'chirilgan correct_answer: nested serializer kabi null
+            return None
+        item = {}
+        for name, column, factory in zip(self.names, self.columns, self.converters):
+            value = getattr(instance, column)
+            if factory is not None and value is not None:
+                value = factory(request)(getattr(value, 'name', value))
+            item[name] = value
+        return item
+
+
+_compiled = {}
+
+
+def flat(serializer_class):
+    """Compiled FlatSerializer for a ModelSerializer class (built once per class)."""
+    compiled = _compiled.get(serializer_class)
+    if compiled is None:
+        compiled = _compiled[serializer_class] = FlatSerializer(serializer_class)
+    return compiled
@@ -0,0 +1,15 @@
+# api/hashers.py
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose iteration count comes from settings.PASSWORD_PBKDF2_ITERATIONS.
+    When the policy changes, must_update() becomes true and the hash is
+    re-encoded on the user's next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', hashers.PBKDF2PasswordHasher.iterations)
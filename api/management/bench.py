@@ -0,0 +1,72 @@
+# api/management/bench.py
+"""Shared helpers for the bench_* management commands."""
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def bench_database(name=None):
+    """
+    Runs the block against a throwaway test database (real data is never touched).
+    Pass a file `name` when several threads need their own connections to it.
+    """
+    if name is not None:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        # Write-behind buferlar test bazasi o'chirilishidan oldin yoziladi (atexit da baza bo'lmaydi)
+        from api.services.activity import session_activity
+        from api.services.question_stats import recorder
+        from api.services.rollups import exam_activity
+        session_activity.flush()
+        recorder.flush()
+        exam_activity.flush()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, iterations):
+    """Calls func() `iterations` times, returns (ops per second, cpu ms per op)."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        func()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return iterations / wall, cpu * 1000 / iterations
+
+
+def make_user(username, password='benchpass', role='STUDENT', device='bench-agent'):
+    """Creates a user with a logged-in UserSession, returns (user, token)."""
+    from api.models import User, UserSession
+
+    user = User.objects.create_user(username=username, password=password, full_name=username, role=role)
+    session = UserSession.objects.create(user=user, device_info=device)
+    return user, str(session.token)
+
+
+def make_question_bank(tests, variants=4, themes=10, tickets=50, batch_size=5000):
+    """Bulk-creates an active question bank, returns (theme ids, ticket ids)."""
+    from api.models import Test, Theme, Ticket, Variant
+
+    theme_ids = [t.id for t in Theme.objects.bulk_create([Theme(name=f'Theme {i}') for i in range(themes)])]
+    ticket_ids = [t.id for t in Ticket.objects.bulk_create([Ticket(name=f'Ticket {i}') for i in range(tickets)])]
+    for start in range(0, tests, batch_size):
+        created = Test.objects.bulk_create([
+            Test(
+                value=f'Question {i}', active=True,
+                theme_id=theme_ids[i % themes], ticket_id=ticket_ids[i % tickets],
+            )
+            for i in range(start, min(start + batch_size, tests))
+        ])
+        rows = Variant.objects.bulk_create([
+            Variant(value=f'Variant {j}', test=test) for test in created for j in range(variants)
+        ])
+        for test, first in zip(created, rows[::variants]):
+            test.correct_answer_id = first.id
+        Test.objects.bulk_update(created, ['correct_answer'])
+    return theme_ids, ticket_ids
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import enums
+from api.models import Result
+from api.services.rollups import backfill
+
+
+class Command(BaseCommand):
+    help = "Recomputes daily / hourly ExamActivity from finished EXAM results, one day per transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="YYYY-MM-DD (default: eng birinchi tugatilgan exam kuni)")
+        parser.add_argument('--to', dest='date_to', help="YYYY-MM-DD (default: bugun)")
+
+    def handle(self, *args, **options):
+        date_from, date_to = self.parse(options['date_from']), self.parse(options['date_to'])
+        if date_to is None:
+            date_to = timezone.localdate()
+        if date_from is None:
+            first = Result.objects.filter(
+                test_type=enums.TestChoices.EXAM, finished=True, end_time__isnull=False,
+            ).order_by('end_time').values_list('end_time', flat=True).first()
+            if first is None:
+                self.stdout.write("tugatilgan exam yo'q")
+                return
+            date_from = timezone.localdate(first)
+
+        total = 0
+        for day, exams in backfill(date_from, date_to):
+            total += exams
+            self.stdout.write(f"{day}: {exams} exam(s)")
+        self.stdout.write(f"backfilled {total} exam(s)")
+
+    def parse(self, value):
+        if value is None:
+            return None
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise CommandError(f"Noto'g'ri sana: {value} (YYYY-MM-DD)")
+        return parsed
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api.management.bench import bench_database, make_user
+from api.services.activity import session_activity
+from api.views.admin_apis import ThemeView
+
+
+class Command(BaseCommand):
+    help = "Counts session writes caused by N admin GET requests (expects O(1))"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options['requests']
+        with bench_database():
+            _, token = make_user('bench_admin', role='ADMIN')
+            view = ThemeView.as_view()
+            factory = RequestFactory()
+            session_activity.flush()
+
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(iterations):
+                    response = view(factory.get('/api/admin/theme/', HTTP_AUTHORIZATION=token))
+                    assert response.status_code == 200, response.status_code
+                flushed = session_activity.flush()
+
+            writes = [q for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('UPDATE')]
+            self.stdout.write(f"{iterations} admin GETs -> {len(writes)} session UPDATE(s), {flushed} row(s) flushed")
+            if len(writes) > 1 + iterations // session_activity.threshold:
+                raise CommandError("last-seen writes are not coalesced")
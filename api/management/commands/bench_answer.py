@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api import enums
+from api.management.bench import bench_database, make_question_bank, make_user, measure
+from api.models import Result, Test, TestSheet
+from api.services import sheets
+from api.views.user_apis import SolveTestViewSet
+
+# Bitta javob uchun ruxsat etilgan so'rovlar soni (BEGIN/COMMIT bilan birga)
+QUERY_BUDGET = 6
+# Testni tugatuvchi javob: yakunlash + userning exam statistikasini yangilash
+FINISH_QUERY_BUDGET = 8
+
+
+class Command(BaseCommand):
+    help = "Queries and throughput of SolveTestViewSet.answer (fails when over the query budget)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--answers', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            make_question_bank(200)
+            user, token = make_user('bench_student')
+            view = SolveTestViewSet.as_view({'post': 'answer'})
+            factory = RequestFactory()
+            test_ids = list(Test.objects.values_list('id', flat=True))
+            correct = dict(Test.objects.values_list('id', 'correct_answer_id'))
+
+            def new_sheets(test_type=enums.TestChoices.THEME, count=len(test_ids)):
+                result = sheets.create_result(user, 'bench', test_type, test_ids[:count])
+                return result, list(TestSheet.objects.filter(result=result).values_list('id', 'test_id', 'variant_orders'))
+
+            def answer(sheet, right=True):
+                sheet_id, test_id, orders = sheet
+                variant_id = correct[test_id] if right else next(v for v in orders if v != correct[test_id])
+                request = factory.post(
+                    f'/api/solve_tests/{sheet_id}/answer/', {'variant_id': variant_id},
+                    HTTP_AUTHORIZATION=token, HTTP_USER_AGENT='bench-agent',
+                )
+                return view(request, pk=sheet_id)
+
+            answer(new_sheets()[1][0])  # auth keshini isitish
+
+            over = []
+
+            def check(label, call, budget=QUERY_BUDGET):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = call()
+                self.stdout.write(f"{label:<14} {response.status_code}  {len(ctx)} queries")
+                if len(ctx) > budget:
+                    over.append(f"{label} ({len(ctx)} > {budget})")
+
+            _, rows = new_sheets()
+            check('correct', lambda: answer(rows[0]))
+            check('incorrect', lambda: answer(rows[1], right=False))
+            check('incorrect', lambda: answer(rows[2], right=False))
+            check('3rd incorrect', lambda: answer(rows[3], right=False), FINISH_QUERY_BUDGET)
+
+            result, rows = new_sheets(enums.TestChoices.EXAM, 20)
+            Result.objects.filter(id=result.id).update(start_time=result.start_time - timedelta(minutes=30))
+            check('expired exam', lambda: answer(rows[0]), FINISH_QUERY_BUDGET)
+
+            _, rows = new_sheets()
+            rows = rows[:options['answers']]
+            pending = iter(rows)
+            ops, cpu_ms = measure(lambda: answer(next(pending)), len(rows))
+            self.stdout.write(f"throughput     {ops:.0f} answers/s  {cpu_ms:.3f} ms cpu/answer")
+
+            if over:
+                raise CommandError(f"over the query budget: {', '.join(over)}")
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.test import RequestFactory
+
+from api import enums
+from api.management.bench import bench_database, make_question_bank, make_user
+from api.models import Result, Test, TestSheet
+from api.services import sheets
+from api.services.exam_state import ExamStateStore, exam_state
+from api.views.user_apis import SolveTestViewSet
+
+
+class Command(BaseCommand):
+    help = "Concurrent answer throughput: direct writes vs the write-behind exam state store"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=16)
+        parser.add_argument('--answers', type=int, default=20)
+
+    def handle(self, *args, **options):
+        workdir = tempfile.mkdtemp(prefix='bench_exam_state_')
+        log_path = os.path.join(workdir, 'exam_state.log')
+        # Threadlar alohida connection ochishi uchun fayl bazasi
+        with bench_database(name=os.path.join(workdir, 'bench.sqlite3')):
+            make_question_bank(max(options['answers'], 20) * 5)
+            self.test_ids = list(Test.objects.values_list('id', flat=True))
+            self.correct = dict(Test.objects.values_list('id', 'correct_answer_id'))
+            self.students = [make_user(f'bench_student_{i}') for i in range(options['students'])]
+            self.view = SolveTestViewSet.as_view({'post': 'answer'})
+            self.factory = RequestFactory()
+
+            direct = self.run_round(options['answers'])
+            self.stdout.write(f"direct writes   {direct:8.0f} answers/s")
+
+            enabled, log = exam_state.enabled, exam_state.log_path
+            exam_state.enabled, exam_state.log_path = True, log_path
+            try:
+                buffered = self.run_round(options['answers'], flush=exam_state.flush)
+            finally:
+                exam_state.enabled, exam_state.log_path = enabled, log
+            self.stdout.write(f"exam state      {buffered:8.0f} answers/s  ({buffered / direct:.1f}x)")
+
+            self.check_counters()
+            self.check_recovery(log_path)
+            connection.close()
+
+    def run_round(self, answers, flush=None):
+        """Har bir student o'z threadida `answers` ta javob yuboradi; answers/s qaytaradi."""
+        rounds = []
+        for user, token in self.students:
+            result = sheets.create_result(user, 'bench', enums.TestChoices.EXAM, self.test_ids[:answers])
+            rows = list(TestSheet.objects.filter(result=result).values_list('id', 'test_id', 'variant_orders'))
+            rounds.append((token, rows))
+
+        barrier = threading.Barrier(len(rounds) + 1)
+        errors = []
+
+        def student(token, rows):
+            try:
+                barrier.wait()
+                for i, (sheet_id, test_id, orders) in enumerate(rows):
+                    # Ikkita noto'g'ri javob: 3-si testni tugatib qo'yadi
+                    right = i not in (1, 2)
+                    variant_id = self.correct[test_id] if right else next(v for v in orders if v != self.correct[test_id])
+                    request = self.factory.post(
+                        f'/api/solve_tests/{sheet_id}/answer/', {'variant_id': variant_id},
+                        HTTP_AUTHORIZATION=token, HTTP_USER_AGENT='bench-agent',
+                    )
+                    response = self.view(request, pk=sheet_id)
+                    if response.status_code != 200:
+                        errors.append(response.data)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=student, args=item) for item in rounds]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        if flush is not None:
+            flush()
+        elapsed = time.perf_counter() - started
+        if errors:
+            raise CommandError(f"{len(errors)} answer(s) failed, first: {errors[0]!r}")
+        return sum(len(rows) for _, rows in rounds) / elapsed
+
+    def check_counters(self):
+        """Result hisoblagichlari TestSheet lar bilan mos kelishi kerak."""
+        mismatched = Result.objects.annotate(
+            ok=Count('testsheet', filter=Q(testsheet__successful=True)),
+            bad=Count('testsheet', filter=Q(testsheet__successful=False)),
+        ).exclude(true_answers=F('ok'), incorrect_answers=F('bad')).count()
+        if mismatched:
+            raise CommandError(f"{mismatched} result(s) have counters out of sync with their sheets")
+        self.stdout.write("counters        in sync")
+
+    def check_recovery(self, log_path):
+        """Javoblar faqat logda qolgan "crash" dan keyin yangi store ularni bazaga yozishi kerak."""
+        user, token = self.students[0]
+        result = sheets.create_result(user, 'bench', enums.TestChoices.EXAM, self.test_ids[:5])
+        crashed = ExamStateStore(enabled=True, log_path=log_path, flush_interval=3600, flush_threshold=10 ** 6)
+        for sheet_id, test_id in TestSheet.objects.filter(result=result).values_list('id', 'test_id'):
+            crashed.submit(user, sheet_id, self.correct[test_id])
+        if TestSheet.objects.filter(result=result, selected=True).exists():
+            raise CommandError("answers reached the database before the flush")
+
+        restarted = ExamStateStore(enabled=True, log_path=log_path)
+        written = restarted.recover()
+        replayed = restarted.recover()
+        result.refresh_from_db()
+        if (written, replayed, result.true_answers) != (5, 0, 5):
+            raise CommandError(f"recovery wrote {written}, replay wrote {replayed}, true_answers={result.true_answers}")
+        self.stdout.write("recovery        5 answer(s) replayed from the log, second replay is a no-op")
+
@@ -0,0 +1,54 @@
+import time
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from api.management.bench import bench_database
+from api.models import User
+from api.views.auth_apis import LoginView
+
+
+class Command(BaseCommand):
+    help = "Login throughput: logins per second and CPU time per login"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=None, help="PBKDF2 iterations override")
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        overrides = {}
+        if options['iterations']:
+            overrides['PASSWORD_PBKDF2_ITERATIONS'] = options['iterations']
+
+        with override_settings(**overrides), bench_database():
+            password = 'bench-password'
+            encoded = make_password(password)
+            User.objects.bulk_create([
+                User(username=f'login{i}', full_name=f'login{i}', password=encoded) for i in range(logins)
+            ])
+
+            # Bitta parol tekshiruvining narxi (taqqoslash uchun)
+            hasher = get_hasher()
+            cpu = time.process_time()
+            hasher.verify(password, encoded)
+            verify_ms = (time.process_time() - cpu) * 1000
+
+            view = LoginView.as_view()
+            factory = RequestFactory()
+            wall, cpu = time.perf_counter(), time.process_time()
+            for i in range(logins):
+                request = factory.post(
+                    '/api/auth/login/', {'username': f'login{i}', 'password': password},
+                    HTTP_USER_AGENT='bench-agent',
+                )
+                response = view(request)
+                assert response.status_code == 200, response.data
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+            cpu_ms = cpu * 1000 / logins
+            self.stdout.write(f"hasher: {hasher.algorithm}, {hasher.iterations} iterations")
+            self.stdout.write(f"logins/s:         {logins / wall:.1f}")
+            self.stdout.write(f"cpu ms per login: {cpu_ms:.1f}")
+            self.stdout.write(f"cpu ms per hash:  {verify_ms:.1f}  (~{cpu_ms / verify_ms:.2f} hashes per login)")
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api import enums
+from api.management.bench import bench_database, make_question_bank, make_user, measure
+from api.models import Test, TestSheet
+from api.services import sheets
+from api.services.question_cache import question_cache
+from api.views.user_apis import SolveTestDetailView
+
+
+class Command(BaseCommand):
+    help = "SolveTestDetailView with a cold vs warm question content cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sheets', type=int, nargs='+', default=[20, 100, 500])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            make_question_bank(max(options['sheets']))
+            user, token = make_user('bench_student')
+            test_ids = list(Test.objects.values_list('id', flat=True))
+            correct = dict(Test.objects.values_list('id', 'correct_answer_id'))
+            view = SolveTestDetailView.as_view()
+            factory = RequestFactory()
+
+            for count in options['sheets']:
+                result = sheets.create_result(user, 'bench', enums.TestChoices.THEME, test_ids[:count])
+                # Yarmiga javob berilgan holat
+                for sheet in TestSheet.objects.filter(result=result).order_by('id')[:count // 2]:
+                    TestSheet.objects.filter(id=sheet.id).update(
+                        current_answer_id=correct[sheet.test_id], selected=True, successful=True
+                    )
+
+                def get():
+                    request = factory.get(
+                        f'/api/result/{result.id}/tests/',
+                        HTTP_AUTHORIZATION=token, HTTP_USER_AGENT='bench-agent',
+                    )
+                    response = view(request, result_id=result.id)
+                    response.render()
+                    return response
+
+                def cold():
+                    question_cache.clear()
+                    return get()
+
+                get()  # auth keshini isitish
+                self.stdout.write(f"{count} sheets:")
+                for label, func in (('cold cache', cold), ('warm cache', get)):
+                    with CaptureQueriesContext(connection) as ctx:
+                        func()
+                    ops, cpu_ms = measure(func, options['repeat'])
+                    self.stdout.write(f"  {label:<11} {1000 / ops:>8.3f} ms/request  {cpu_ms:.3f} ms cpu  {len(ctx)} queries")
@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api import enums
+from api.flat_serializers import flat
+from api.management.bench import bench_database, make_question_bank, measure
+from api.models import Result, Test, Theme, Variant
+from api.serializers import GetTestSerializer, GetVariantSerializer, ThemeSerializer, VariantSerializer
+from api.views.user_apis import ResultSerializer
+
+
+class Command(BaseCommand):
+    help = "DRF ModelSerializer vs flat values_list() serializers (fails if the JSON differs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        largest = max(options['sizes'])
+        with bench_database():
+            make_question_bank(largest, variants=1, themes=largest, tickets=10)
+            # Rasmli va rasmsiz testlar
+            Test.objects.filter(id__in=list(Test.objects.values_list('id', flat=True))[::2]).update(image='images/bench.png')
+            user = get_user_model().objects.create_user(username='bench', password='x', full_name='bench')
+            Result.objects.bulk_create([
+                Result(user=user, description=f'Result {i}', test_length=20, true_answers=i % 21,
+                       test_type=enums.TestChoices.EXAM, finished=True)
+                for i in range(largest)
+            ])
+            for size in options['sizes']:
+                cases = (
+                    (ThemeSerializer, Theme.objects.order_by('id')[:size]),
+                    (VariantSerializer, Variant.objects.order_by('id')[:size]),
+                    (GetVariantSerializer, Variant.objects.order_by('id')[:size]),
+                    (GetTestSerializer, Test.objects.order_by('id')[:size]),
+                    (ResultSerializer, Result.objects.order_by('id')[:size]),
+                )
+                self.stdout.write(f"{size} rows:")
+                for serializer_class, queryset in cases:
+                    compiled = flat(serializer_class)
+                    expected = renderer.render(serializer_class(queryset, many=True).data)
+                    if renderer.render(compiled.many(queryset)) != expected:
+                        raise CommandError(f"{serializer_class.__name__}: flat JSON differs from DRF")
+                    instance = queryset[0]
+                    if renderer.render(compiled.one(instance)) != renderer.render(serializer_class(instance).data):
+                        raise CommandError(f"{serializer_class.__name__}: flat JSON differs from DRF (single object)")
+
+                    drf_ops, _ = measure(lambda: serializer_class(queryset.all(), many=True).data, options['repeat'])
+                    flat_ops, _ = measure(lambda: compiled.many(queryset.all()), options['repeat'])
+                    self.stdout.write(
+                        f"  {serializer_class.__name__:<21} drf {1000 / drf_ops:8.2f} ms  "
+                        f"flat {1000 / flat_ops:8.2f} ms  ({flat_ops / drf_ops:.1f}x)"
+                    )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from api.management.bench import bench_database, make_user, measure
+from api.services.session_cache import session_cache
+from api.views.user_apis import Profile
+
+
+class Command(BaseCommand):
+    help = "Authenticated requests per second with the token-session cache on and off"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['requests']
+        with bench_database():
+            _, token = make_user('bench_student')
+            view = Profile.as_view()
+            factory = RequestFactory()
+
+            def call():
+                request = factory.get('/api/profile/', HTTP_AUTHORIZATION=token, HTTP_USER_AGENT='bench-agent')
+                response = view(request)
+                assert response.status_code == 200, response.status_code
+
+            enabled = session_cache.enabled
+            try:
+                for label, state in (('cache off', False), ('cache on', True)):
+                    session_cache.enabled = state
+                    session_cache.clear()
+                    call()
+                    with CaptureQueriesContext(connection) as ctx:
+                        call()
+                    rps, cpu_ms = measure(call, iterations)
+                    self.stdout.write(
+                        f"{label:<10} {rps:>9.0f} req/s  {cpu_ms:.3f} ms cpu/req  {len(ctx)} queries/req"
+                    )
+            finally:
+                session_cache.enabled = enabled
+                session_cache.clear()
@@ -0,0 +1,41 @@
+from random import sample
+
+from django.core.management.base import BaseCommand
+
+from api.management.bench import bench_database, make_question_bank, measure
+from api.models import Test
+from api.services.test_index import active_tests
+
+
+class Command(BaseCommand):
+    help = "Exam sampling: full Test materialization vs the in-memory active-test index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--count', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        for size in options['sizes']:
+            with bench_database():
+                make_question_bank(size, variants=1)
+
+                def legacy():
+                    tests = Test.objects.filter(active=True)
+                    if tests.count() < count:
+                        raise AssertionError(tests.count())
+                    return [t.id for t in sample(list(tests), count)]
+
+                def cold():
+                    active_tests.invalidate()
+                    return active_tests.sample(count)
+
+                def warm():
+                    return active_tests.sample(count)
+
+                self.stdout.write(f"{size} active questions:")
+                for label, func in (('legacy', legacy), ('index cold', cold), ('index warm', warm)):
+                    ops, cpu_ms = measure(func, repeat if label != 'index warm' else repeat * 100)
+                    self.stdout.write(f"  {label:<11} {1000 / ops:>9.3f} ms/sample  {cpu_ms:.3f} ms cpu")
+                active_tests.invalidate()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.services.exam_pool import exam_pool
+
+
+class Command(BaseCommand):
+    help = "Tops the pre-generated exam pool up to EXAM_POOL_SIZE blueprints"
+
+    def handle(self, *args, **options):
+        created = exam_pool.refill()
+        self.stdout.write(f"{created} blueprint(s) created")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.services.deadlines import expired_exams, finalize_expired, next_deadline
+
+
+class Command(BaseCommand):
+    help = "Finishes EXAM results whose 25-minute limit ran out, in set-based batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{expired_exams().count()} expired exam(s) waiting")
+            return
+
+        total = batches = 0
+        for stats in finalize_expired(options['batch_size']):
+            batches += 1
+            total += stats.results
+            self.stdout.write(f"batch {batches}: {stats.results} exam(s) in {stats.seconds * 1000:.1f} ms")
+        self.stdout.write(f"finished {total} expired exam(s) in {batches} batch(es)")
+        deadline = next_deadline()
+        if deadline is not None:
+            self.stdout.write(f"next deadline: {deadline.isoformat()}")
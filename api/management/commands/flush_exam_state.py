@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.services.exam_state import exam_state
+
+
+class Command(BaseCommand):
+    help = "Replays answers left in EXAM_STATE_LOG into TestSheet / Result (safe to run twice)"
+
+    def handle(self, *args, **options):
+        if not exam_state.log_path:
+            self.stdout.write("EXAM_STATE_LOG is not set, nothing to recover")
+            return
+        written = exam_state.recover()
+        self.stdout.write(f"recovered {written} answer(s) from {exam_state.log_path}")
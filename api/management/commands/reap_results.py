@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.services.reaper import reap
+
+
+class Command(BaseCommand):
+    help = "Deletes superseded and stale unfinished Results in chunked batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--stale-hours', type=float, default=None)
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        stale_after = None
+        if options['stale_hours'] is not None:
+            stale_after = timedelta(hours=options['stale_hours'])
+
+        results = sheets = batches = 0
+        for stats in reap(options['batch_size'], stale_after, options['max_batches']):
+            batches += 1
+            results += stats.results
+            sheets += stats.sheets
+            self.stdout.write(
+                f"batch {batches}: {stats.results} result(s), {stats.sheets} sheet(s) in {stats.seconds * 1000:.1f} ms"
+            )
+        self.stdout.write(f"reclaimed {results} result(s), {sheets} test sheet(s) in {batches} batch(es)")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.services.stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recomputes UserExamStats from finished EXAM results with SQL Sum/Count/Max"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = 0
+        for batch, written in enumerate(rebuild(options['batch_size']), 1):
+            total += written
+            self.stdout.write(f"batch {batch}: {written} user(s)")
+        self.stdout.write(f"rebuilt stats for {total} user(s)")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.services.question_stats import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recomputes QuestionStats / VariantStats from answered TestSheets, in chunks of tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = 0
+        for batch, written in enumerate(rebuild(options['batch_size']), 1):
+            total += written
+            self.stdout.write(f"batch {batch}: {written} question(s)")
+        self.stdout.write(f"rebuilt stats for {total} question(s)")
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_remove_variant_image_test_image_delete_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Data',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='description',
+            field=models.TextField(default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='incorrect_answers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='testsheet',
+            name='test',
+            field=models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, to='api.test'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='testsheet',
+            name='variant_orders',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='test_type',
+            field=models.CharField(choices=[('THEME', 'Theme'), ('EXAM', 'Exam'), ('TICKET', 'Ticket'), ('SETTEST', 'Settest')], default='EXAM', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='result',
+            name='true_answers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='test',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='images/'),
+        ),
+    ]
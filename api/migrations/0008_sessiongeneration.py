@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_sync_model_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionGeneration',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('generation', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
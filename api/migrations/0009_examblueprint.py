@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_sessiongeneration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamBlueprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_ids', models.JSONField()),
+                ('variant_orders', models.JSONField()),
+                ('count', models.PositiveIntegerField()),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['count', 'claimed_at'], name='api_examblu_count_f11d5b_idx')],
+            },
+        ),
+    ]
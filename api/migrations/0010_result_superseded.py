@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_examblueprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='superseded',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_result_superseded'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['test_type', 'finished', 'start_time'], name='result_open_start_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import random
+
+from django.db import migrations
+
+
+def backfill_variant_orders(apps, schema_editor):
+    """Eski sheetlar uchun variant tartibi bir marta shu yerda belgilanadi (GET endi yozmaydi)."""
+    TestSheet = apps.get_model('api', 'TestSheet')
+    Variant = apps.get_model('api', 'Variant')
+
+    while True:
+        batch = list(TestSheet.objects.filter(variant_orders__isnull=True).only('id', 'test_id')[:1000])
+        if not batch:
+            return
+        variants = {}
+        for test_id, variant_id in Variant.objects.filter(
+            test_id__in={sheet.test_id for sheet in batch}
+        ).order_by('id').values_list('test_id', 'id'):
+            variants.setdefault(test_id, []).append(variant_id)
+        for sheet in batch:
+            ids = variants.get(sheet.test_id, [])
+            sheet.variant_orders = random.sample(ids, len(ids))
+        TestSheet.objects.bulk_update(batch, ['variant_orders'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_result_open_start_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_variant_orders, migrations.RunPython.noop),
+    ]
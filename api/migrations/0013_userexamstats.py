@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def fill_exam_stats(apps, schema_editor):
+    """Mavjud tugatilgan EXAM natijalaridan boshlang'ich statistika."""
+    Result = apps.get_model('api', 'Result')
+    UserExamStats = apps.get_model('api', 'UserExamStats')
+    rows = Result.objects.filter(test_type='EXAM', finished=True).order_by().values('user_id').annotate(
+        exam_count=Count('id'),
+        true_sum=Sum('true_answers'),
+        incorrect_sum=Sum('incorrect_answers'),
+        questions=Sum('test_length'),
+        best_score=Max('true_answers'),
+        pass_count=Count('id', filter=Q(true_answers__gte=18)),
+    )
+    UserExamStats.objects.bulk_create([
+        UserExamStats(
+            user_id=row['user_id'], exam_count=row['exam_count'], true_answers=row['true_sum'],
+            incorrect_answers=row['incorrect_sum'], questions=row['questions'],
+            best_score=row['best_score'], pass_count=row['pass_count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_backfill_variant_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserExamStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='exam_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('exam_count', models.PositiveIntegerField(default=0)),
+                ('true_answers', models.PositiveIntegerField(default=0)),
+                ('incorrect_answers', models.PositiveIntegerField(default=0)),
+                ('questions', models.PositiveIntegerField(default=0)),
+                ('best_score', models.PositiveIntegerField(default=0)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(fill_exam_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+def fill_averages(apps, schema_editor):
+    UserExamStats = apps.get_model('api', 'UserExamStats')
+    rows = list(UserExamStats.objects.all())
+    for row in rows:
+        answered = row.true_answers + row.incorrect_answers
+        row.average_score = row.true_answers / row.exam_count if row.exam_count else 0
+        row.average_percent = row.true_answers * 100 / answered if answered else 0
+    UserExamStats.objects.bulk_update(rows, ['average_score', 'average_percent'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_userexamstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userexamstats',
+            name='average_percent',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userexamstats',
+            name='average_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userexamstats',
+            index=models.Index(fields=['-average_percent', 'user'], name='exam_stats_average_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userexamstats',
+            index=models.Index(fields=['-best_score', 'user'], name='exam_stats_best_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userexamstats',
+            index=models.Index(fields=['-exam_count', 'user'], name='exam_stats_attempts_idx'),
+        ),
+        migrations.RunPython(fill_averages, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_exam_stats_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('end_time__isnull', False), ('finished', True)), fields=['test_type', '-end_time', '-id'], name='result_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('end_time__isnull', False), ('finished', True)), fields=['user', 'test_type', '-end_time', '-id'], name='result_user_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_result_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='result',
+            name='result_open_start_idx',
+        ),
+        migrations.AlterField(
+            model_name='usersession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('finished', False), ('superseded', False)), fields=['test_type', 'start_time'], name='result_open_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('finished', False), ('superseded', False)), fields=['user'], name='result_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('finished', False)), fields=['id'], name='result_unfinished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('active', True)), fields=['theme', 'id'], name='test_active_theme_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='test',
+            index=models.Index(condition=models.Q(('active', True)), fields=['ticket', 'id'], name='test_active_ticket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testsheet',
+            index=models.Index(condition=models.Q(('successful', True)), fields=['result'], name='testsheet_result_success_idx'),
+        ),
+    ]
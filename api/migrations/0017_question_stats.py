@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_question_stats(apps, schema_editor):
+    """Mavjud javoblardan (TestSheet.selected) boshlang'ich hisoblagichlar."""
+    Test = apps.get_model('api', 'Test')
+    TestSheet = apps.get_model('api', 'TestSheet')
+    QuestionStats = apps.get_model('api', 'QuestionStats')
+    VariantStats = apps.get_model('api', 'VariantStats')
+    tests = {row[0]: row[1:] for row in Test.objects.values_list('id', 'theme_id', 'ticket_id')}
+    answered = TestSheet.objects.filter(selected=True)
+    rows = answered.order_by().values('test_id').annotate(
+        answered=Count('id'), correct=Count('id', filter=Q(successful=True)),
+    )
+    QuestionStats.objects.bulk_create([
+        QuestionStats(
+            test_id=row['test_id'], theme_id=tests[row['test_id']][0], ticket_id=tests[row['test_id']][1],
+            answered=row['answered'], correct=row['correct'], success_rate=row['correct'] / row['answered'],
+        )
+        for row in rows
+    ], batch_size=1000)
+    rows = answered.filter(current_answer__isnull=False).order_by().values('test_id', 'current_answer_id').annotate(
+        chosen=Count('id'),
+    )
+    VariantStats.objects.bulk_create([
+        VariantStats(variant_id=row['current_answer_id'], test_id=row['test_id'], chosen=row['chosen'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantStats',
+            fields=[
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='answer_stats', serialize=False, to='api.variant')),
+                ('chosen', models.PositiveIntegerField(default=0)),
+                ('test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.test')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('test', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='answer_stats', serialize=False, to='api.test')),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('success_rate', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('theme', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.theme')),
+                ('ticket', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['success_rate', 'test'], name='question_stats_hardest_idx'), models.Index(fields=['theme', 'success_rate', 'test'], name='question_stats_theme_idx'), models.Index(fields=['ticket', 'success_rate', 'test'], name='question_stats_ticket_idx')],
+            },
+        ),
+        migrations.RunPython(fill_question_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_question_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('DAY', 'Day'), ('HOUR', 'Hour')], max_length=10)),
+                ('start', models.DateTimeField()),
+                ('exams', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('true_answers', models.PositiveIntegerField(default=0)),
+                ('abandoned', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'start'), name='exam_activity_bucket_uniq')],
+            },
+        ),
+    ]
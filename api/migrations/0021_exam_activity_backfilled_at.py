@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examactivity',
+            name='backfilled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_exam_activity_backfilled_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionstats',
+            name='rebuilt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -43,6 +43,13 @@ class Test(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Faol testlar mavzu / bilet bo'yicha (faqat active=True qatorlar indekslanadi)
+            models.Index(fields=['theme', 'id'], name='test_active_theme_idx', condition=models.Q(active=True)),
+            models.Index(fields=['ticket', 'id'], name='test_active_ticket_idx', condition=models.Q(active=True)),
+        ]
+
     def delete(self, *args, **kwargs):
         """
         Model o'chirilganda faylni ham o'chiradi
@@ -97,8 +104,30 @@ class Result(models.Model):
         default=enums.TestChoices.EXAM
     )
     finished = models.BooleanField(default=False)
+    # Yangi test boshlanganda tugatilmagan eski urinish shunchaki belgilanadi (reaper keyin o'chiradi)
+    superseded = models.BooleanField(default=False)
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # SQLite da `finished` shart sifatida yalang'och ustun bo'lib chiqadi (finished = 1 emas),
+            # shuning uchun boolean filtrlar indeks ustuni emas, partial indeks sharti qilinadi.
+            # Deadline scheduler ochiq examlarni start_time tartibida o'qiydi
+            models.Index(fields=['test_type', 'start_time'], name='result_open_start_idx',
+                         condition=models.Q(finished=False, superseded=False)),
+            # Yangi test boshlanganda userning ochiq urinishlari (supersede)
+            models.Index(fields=['user'], name='result_user_open_idx',
+                         condition=models.Q(finished=False, superseded=False)),
+            # Reaper tugatilmagan natijalarni id tartibida o'qiydi
+            models.Index(fields=['id'], name='result_unfinished_idx', condition=models.Q(finished=False)),
+            # Natijalar lentasi: (end_time, id) bo'yicha keyset, umumiy va user bo'yicha
+            models.Index(fields=['test_type', '-end_time', '-id'], name='result_feed_idx',
+                         condition=models.Q(finished=True, end_time__isnull=False)),
+            models.Index(fields=['user', 'test_type', '-end_time', '-id'], name='result_user_feed_idx',
+                         condition=models.Q(finished=True, end_time__isnull=False)),
+        ]
+
     def __str__(self):
         return f"{self.description} - {self.user.username}"
 class TestSheet(models.Model):
@@ -110,10 +139,18 @@ class TestSheet(models.Model):
     successful = models.BooleanField(default=None, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # finish / javob: natijadagi to'g'ri javoblar soni (true_answers_subquery)
+            models.Index(fields=['result'], name='testsheet_result_success_idx', condition=models.Q(successful=True)),
+        ]
+
     def save(self, *args, **kwargs):
-        vars = Variant.objects.filter(test=self.test)
-        self.varian_orders = [v.id for v in vars]
-        self.varian_orders = random.sample(self.varian_orders, len(self.varian_orders))
+        # Variantlar tartibi faqat bir marta, yaratilganda belgilanadi
+        if self.variant_orders is None:
+            vars = Variant.objects.filter(test=self.test)
+            self.variant_orders = [v.id for v in vars]
+            self.variant_orders = random.sample(self.variant_orders, len(self.variant_orders))
         super().save(*args, **kwargs)
     def __str__(self):
         return f"{self.test} - {self.result.id} - {'Successful' if self.successful else 'Unsuccessful'}"
@@ -124,12 +161,127 @@ class UserSession(models.Model):
     device_info = models.CharField(max_length=255, blank=True, null=True)  # user-agent
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    # Eski sessiyalarni tozalash (updated_at < cutoff) uchun indeks
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.user.username} -> {self.token}"
 
 
+class SessionGeneration(models.Model):
+    # Signed token rejimi: login/logout da generation oshiriladi va eski tokenlar bekor bo'ladi.
+    # User o'chirilganda ham qator qolishi uchun ForeignKey emas, oddiy id.
+    user_id = models.BigIntegerField(primary_key=True)
+    generation = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.generation}"
+
+
+
+class ExamBlueprint(models.Model):
+    # Oldindan tayyorlangan exam: tanlangan test id lar va har biri uchun variantlar tartibi
+    test_ids = models.JSONField()
+    variant_orders = models.JSONField()
+    count = models.PositiveIntegerField()
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['count', 'claimed_at'])]
+
+    def __str__(self):
+        return f"Blueprint {self.id} ({self.count} ta test)"
+
+
+class UserExamStats(models.Model):
+    # Userning tugatilgan EXAM natijalari bo'yicha tayyor statistika (api/services/stats.py yangilaydi)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='exam_stats')
+    exam_count = models.PositiveIntegerField(default=0)
+    true_answers = models.PositiveIntegerField(default=0)
+    incorrect_answers = models.PositiveIntegerField(default=0)
+    questions = models.PositiveIntegerField(default=0)  # test_length lar yig'indisi
+    best_score = models.PositiveIntegerField(default=0)
+    pass_count = models.PositiveIntegerField(default=0)
+    # Leaderboard saralashi uchun oldindan hisoblangan o'rtachalar
+    average_score = models.FloatField(default=0)
+    average_percent = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-average_percent', 'user'], name='exam_stats_average_idx'),
+            models.Index(fields=['-best_score', 'user'], name='exam_stats_best_idx'),
+            models.Index(fields=['-exam_count', 'user'], name='exam_stats_attempts_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.exam_count} ta exam"
+
+
+class QuestionStats(models.Model):
+    # Savol bo'yicha javoblar hisoblagichi (api/services/question_stats.py yangilaydi).
+    # theme/ticket Test dan nusxa: "eng qiyin savollar" bitta indeks bo'yicha o'qiladi.
+    test = models.OneToOneField(Test, on_delete=models.CASCADE, primary_key=True, related_name='answer_stats')
+    theme = models.ForeignKey(Theme, on_delete=models.CASCADE, null=True, blank=True, db_index=False, related_name='+')
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, null=True, blank=True, db_index=False, related_name='+')
+    answered = models.PositiveIntegerField(default=0)
+    correct = models.PositiveIntegerField(default=0)
+    success_rate = models.FloatField(default=0)  # correct / answered, 0..1
+    updated_at = models.DateTimeField(auto_now=True)
+    # rebuild shu paytgacha bo'lgan javoblarni TestSheet dan sanagan; undan oldingi deltalar qo'shilmaydi
+    rebuilt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['success_rate', 'test'], name='question_stats_hardest_idx'),
+            models.Index(fields=['theme', 'success_rate', 'test'], name='question_stats_theme_idx'),
+            models.Index(fields=['ticket', 'success_rate', 'test'], name='question_stats_ticket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.test_id}: {self.correct}/{self.answered}"
+
+
+class VariantStats(models.Model):
+    # Variant necha marta tanlangani
+    variant = models.OneToOneField(Variant, on_delete=models.CASCADE, primary_key=True, related_name='answer_stats')
+    test = models.ForeignKey(Test, on_delete=models.CASCADE, related_name='+')
+    chosen = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.variant_id}: {self.chosen}"
+
+
+class ExamActivity(models.Model):
+    # Kunlik / soatlik EXAM faolligi (api/services/rollups.py yangilaydi); start - mahalliy vaqtdagi oraliq boshi
+    period = models.CharField(max_length=10, choices=enums.PeriodChoices.choices)
+    start = models.DateTimeField()
+    exams = models.PositiveIntegerField(default=0)  # tugatilgan examlar (end_time bo'yicha)
+    passed = models.PositiveIntegerField(default=0)
+    true_answers = models.PositiveIntegerField(default=0)  # o'rtacha ball uchun yig'indi
+    abandoned = models.PositiveIntegerField(default=0)  # tugatilmay tashlab ketilgan (superseded) examlar (start_time bo'yicha)
+    # backfill shu paytgacha bo'lgan hodisalarni Result dan sanagan; undan oldingi deltalar qo'shilmaydi
+    backfilled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'start'], name='exam_activity_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.start:%Y-%m-%d %H:00}: {self.exams} ta exam"
+
+
+class DashboardCounter(models.Model):
+    # Admin dashboard hisoblagichlari (api/services/dashboard.py); signal lar F() bilan qo'shadi
+    name = models.CharField(max_length=32, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
 
 class Data(models.Model):
     key = models.CharField(max_length=100, unique=True)
@@ -66,7 +66,7 @@ class LoginSerializer(serializers.Serializer):
         password = data.get('password')
 
         if username and password:
-            user = authenticate(username=username, password=password)
+            user = authenticate(self.context.get('request'), username=username, password=password)
             if user:
                 if not user.is_active:
                     raise serializers.ValidationError("User is deactivated.")
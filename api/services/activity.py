@@ -0,0 +1,79 @@
+# api/services/activity.py
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, Value, When
+from django.utils.timezone import now
+
+
+class ActivityTracker:
+    """
+    Write-behind "last seen" tracker.
+    touch() only records the timestamp in memory; pending timestamps are written
+    with a single bulk UPDATE once `interval` seconds passed or `threshold` rows piled up,
+    and by the periodic job (api/services/jobs.py) while the worker is idle.
+    """
+    batch_size = 300
+
+    def __init__(self, model, field='updated_at', interval=30, threshold=500):
+        self.model = model
+        self.field = field
+        self.interval = interval
+        self.threshold = threshold
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def touch(self, pk, when=None):
+        with self._lock:
+            self._pending[pk] = when or now()
+            due = (
+                len(self._pending) >= self.threshold
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Writes all pending timestamps, returns the number of rows touched."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return 0
+
+        output_field = self.model._meta.get_field(self.field)
+        items = list(pending.items())
+        updated = 0
+        for i in range(0, len(items), self.batch_size):
+            batch = items[i:i + self.batch_size]
+            updated += self.model.objects.filter(pk__in=[pk for pk, _ in batch]).update(**{
+                self.field: Case(
+                    *[When(pk=pk, then=Value(ts, output_field=output_field)) for pk, ts in batch],
+                    output_field=output_field,
+                )
+            })
+        return updated
+
+    def run(self):
+        """Entry point for the in-process periodic job."""
+        self.flush()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def _session_tracker():
+    from api.models import UserSession
+    return ActivityTracker(
+        UserSession,
+        field='updated_at',
+        interval=getattr(settings, 'SESSION_ACTIVITY_FLUSH_INTERVAL', 30),
+        threshold=getattr(settings, 'SESSION_ACTIVITY_FLUSH_THRESHOLD', 500),
+    )
+
+
+session_activity = _session_tracker()
+atexit.register(session_activity.flush)
@@ -0,0 +1,207 @@
+# api/services/answers.py
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, F, IntegerField, Value, When
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from api.models import Result, TestSheet, Variant
+from api.flat_serializers import flat
+from api.serializers import VariantSerializer
+from api.services import results
+from api.services.question_stats import recorder
+
+
+def checked_variant_id(sheet, variant_id):
+    """
+    Variant shu testga tegishli ekanini tekshiradi: variant_orders dagilar bazaga murojaatsiz,
+    sheet yaratilgandan keyin qo'shilganlari (ro'yxat oxirida ko'rsatiladi) bazadan.
+    """
+    try:
+        variant_id = int(variant_id)
+    except (TypeError, ValueError):
+        raise Http404("No Variant matches the given query.")
+    valid = (
+        sheet.variant_orders is not None and variant_id in sheet.variant_orders
+        or Variant.objects.filter(id=variant_id, test_id=sheet.test_id).exists()
+    )
+    if not valid:
+        raise Http404("No Variant matches the given query.")
+    return variant_id
+
+
+def submit_answer(user, sheet_id, variant_id):
+    """
+    Records one answer with a single joined read and atomic F() counter updates.
+    Returns (payload, status) with the same shapes SolveTestViewSet.answer always had.
+    """
+    sheet = get_object_or_404(
+        TestSheet.objects.select_related('result', 'test__correct_answer'),
+        id=sheet_id, result__user=user,
+    )
+    result = sheet.result
+    if result.finished or result.superseded:
+        return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+    variant_id = checked_variant_id(sheet, variant_id)
+
+    # 25 minut gacha javoblarni kirita olsin
+    if results.exam_expired(result.test_type, result.start_time):
+        if not results.finish([result.id], test_type=result.test_type):
+            return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+        true_answers = Result.objects.values_list('true_answers', flat=True).get(id=result.id)
+        return {
+            "message": "Test tugatildi",
+            "result_id": result.id,
+            "true_answers": true_answers,
+            "test_length": result.test_length, "finished": True
+        }, 200
+
+    if sheet.selected:
+        return {"error": "TestSheet ga variant belgilangan"}, 400
+
+    successful = variant_id == sheet.test.correct_answer_id
+    counter = 'true_answers' if successful else 'incorrect_answers'
+    try:
+        with transaction.atomic():
+            # selected=False sharti bir vaqtdagi ikki bosishdan himoya qiladi
+            answered = TestSheet.objects.filter(id=sheet.id, selected=False).update(
+                current_answer_id=variant_id, selected=True, successful=successful
+            )
+            if not answered:
+                return {"error": "TestSheet ga variant belgilangan"}, 400
+            if not Result.objects.filter(id=result.id, finished=False, superseded=False).update(
+                **{counter: F(counter) + 1}
+            ):
+                transaction.set_rollback(True)
+                return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+            recorder.record_on_commit([(sheet.test_id, variant_id, successful)])
+
+            # 3-noto'g'ri javobda test yakunlanadi (shart UPDATE ning o'zida)
+            if not successful and results.finish(
+                [result.id], test_type=result.test_type, incorrect_answers__gte=results.MAX_INCORRECT,
+            ):
+                return {"error": "Test yakunlandi!", "finished": True}, 200
+    except IntegrityError:
+        # Variant javob berish paytida o'chirilgan
+        raise Http404("No Variant matches the given query.")
+
+    return {
+        "message": "Javob saqlandi",
+        "testsheet_id": sheet.id,
+        "correct_answer": flat(VariantSerializer).one(sheet.test.correct_answer),
+        "successful": successful
+    }, 200
+
+
+def _batch_error(sheet_id, error, status=400, **extra):
+    return {"testsheet_id": sheet_id, "status": status, "error": error, **extra}
+
+
+def submit_answers(user, result_id, items):
+    """
+    Records many (testsheet_id, variant_id) answers of one Result at once:
+    one read for the Result, one for all its sheets and set-based UPDATEs.
+    Applies the same rules as submit_answer() item by item, in the given order.
+    Returns (payload, status); payload["results"] holds the per-item outcome.
+    """
+    max_items = getattr(settings, 'ANSWER_BATCH_MAX_ITEMS', 100)
+    if not isinstance(items, list) or not items:
+        return {"error": "answers ro'yxati bo'sh bo'lmasligi kerak"}, 400
+    if len(items) > max_items:
+        return {"error": f"Bir so'rovda ko'pi bilan {max_items} ta javob yuborish mumkin"}, 400
+
+    try:
+        with transaction.atomic():
+            # Bir xil Result ga parallel batchlar navbat bilan ishlanadi
+            result = get_object_or_404(Result.objects.select_for_update(), id=result_id, user=user)
+            if result.finished or result.superseded:
+                return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+
+            if results.exam_expired(result.test_type, result.start_time):
+                results.finish([result.id], test_type=result.test_type)
+                result.refresh_from_db(fields=['true_answers'])
+                return {
+                    "message": "Test tugatildi",
+                    "result_id": result.id,
+                    "true_answers": result.true_answers,
+                    "test_length": result.test_length, "finished": True
+                }, 200
+
+            sheet_ids = set()
+            for item in items:
+                try:
+                    sheet_ids.add(int(item["testsheet_id"]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            sheets = TestSheet.objects.filter(result=result).select_related('test__correct_answer').in_bulk(sheet_ids)
+
+            # 1️⃣ Har bir javobni ketma-ket tekshiramiz (yakka answer() bilan bir xil qoidalar)
+            outcome, applied, seen = [], {}, set()
+            incorrect = result.incorrect_answers
+            finished = False
+            for item in items:
+                sheet_id = item.get("testsheet_id") if isinstance(item, dict) else None
+                if finished:
+                    outcome.append(_batch_error(sheet_id, "Test allaqachon tugatilgan", finished=True))
+                    continue
+                try:
+                    sheet = sheets[int(sheet_id)]
+                except (KeyError, TypeError, ValueError):
+                    outcome.append(_batch_error(sheet_id, "No TestSheet matches the given query.", 404))
+                    continue
+                try:
+                    variant_id = checked_variant_id(sheet, item.get("variant_id"))
+                except Http404 as exc:
+                    outcome.append(_batch_error(sheet.id, str(exc), 404))
+                    continue
+                if sheet.selected or sheet.id in seen:
+                    outcome.append(_batch_error(sheet.id, "TestSheet ga variant belgilangan"))
+                    continue
+
+                seen.add(sheet.id)
+                successful = variant_id == sheet.test.correct_answer_id
+                applied[sheet.id] = (variant_id, successful)
+                outcome.append({
+                    "testsheet_id": sheet.id,
+                    "status": 200,
+                    "message": "Javob saqlandi",
+                    "correct_answer": flat(VariantSerializer).one(sheet.test.correct_answer),
+                    "successful": successful
+                })
+                if not successful:
+                    incorrect += 1
+                    finished = incorrect >= results.MAX_INCORRECT
+
+            # 2️⃣ Qabul qilingan javoblarni set-based UPDATE lar bilan yozamiz
+            if applied:
+                answered = TestSheet.objects.filter(id__in=applied, selected=False).update(
+                    current_answer_id=Case(
+                        *[When(id=pk, then=Value(v)) for pk, (v, _) in applied.items()],
+                        output_field=IntegerField(),
+                    ),
+                    successful=Case(
+                        *[When(id=pk, then=Value(ok)) for pk, (_, ok) in applied.items()],
+                        output_field=BooleanField(),
+                    ),
+                    selected=True,
+                )
+                if answered != len(applied):
+                    # Parallel yakka answer() bilan to'qnashuv: hech narsa yozilmaydi
+                    transaction.set_rollback(True)
+                    return {"error": "Javoblar bir vaqtda o'zgardi, qayta yuboring"}, 409
+                true_count = sum(ok for _, ok in applied.values())
+                Result.objects.filter(id=result.id).update(
+                    true_answers=F('true_answers') + true_count,
+                    incorrect_answers=F('incorrect_answers') + len(applied) - true_count,
+                )
+                recorder.record_on_commit([(sheets[pk].test_id, v, ok) for pk, (v, ok) in applied.items()])
+            if finished:
+                results.finish([result.id], test_type=result.test_type, incorrect_answers__gte=results.MAX_INCORRECT)
+    except IntegrityError:
+        # Variant javob berish paytida o'chirilgan
+        raise Http404("No Variant matches the given query.")
+
+    payload = {"result_id": result.id, "finished": finished, "results": outcome}
+    if finished:
+        payload["error"] = "Test yakunlandi!"
+    return payload, 200
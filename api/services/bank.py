@@ -0,0 +1,9 @@
+# api/services/bank.py
+from api.services.exam_pool import exam_pool
+from api.services.test_index import active_tests
+
+
+def question_bank_changed():
+    """Admin wrote a Test/Variant/Theme/Ticket: drop everything derived from the question bank."""
+    active_tests.invalidate()
+    exam_pool.invalidate()
@@ -0,0 +1,71 @@
+# api/services/catalog.py
+"""
+Theme / ticket catalog for the app (GetThemes / GetTickets), pre-rendered once
+into JSON bytes with a content ETag. Every item carries `active_tests`, the
+number of active tests the index (test_index.active_tests) has for it, so the
+app can hide themes start_theme would reject.
+
+A page is rebuilt when the 'catalog' version (bumped by admin theme / ticket
+writes) or the active test index snapshot changes; otherwise serving it reads
+no rows. The version is in the shared cache: the writing worker rebuilds at
+once, the others within VERSION_CHECK_INTERVAL seconds.
+"""
+import threading
+from collections import namedtuple
+
+from rest_framework.renderers import JSONRenderer
+
+from api.flat_serializers import flat
+from api.models import Theme, Ticket
+from api.serializers import ThemeSerializer, TicketSerializer
+from api.services import versions
+from api.services.test_index import EMPTY, active_tests
+from api.utils import make_etag
+
+VERSION_NAME = 'catalog'
+
+CatalogPage = namedtuple('CatalogPage', ['key', 'body', 'etag'])
+
+
+class CatalogCache:
+    """One pre-rendered list; `partition` is the IndexSnapshot field with the per-item test ids."""
+
+    def __init__(self, queryset, serializer_class, partition):
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.partition = partition
+        self._page = None
+        self._lock = threading.Lock()
+
+    def page(self):
+        snapshot = active_tests.snapshot()
+        key = (versions.get_version(VERSION_NAME), snapshot.version, snapshot.built_at)
+        page = self._page
+        if page is None or page.key != key:
+            with self._lock:
+                page = self._page
+                if page is None or page.key != key:
+                    page = self._page = self._build(key, getattr(snapshot, self.partition))
+        return page
+
+    def _build(self, key, test_ids):
+        rows = flat(self.serializer_class).many(self.queryset())
+        for row in rows:
+            row['active_tests'] = len(test_ids.get(row['id'], EMPTY))
+        body = JSONRenderer().render(rows)
+        # ETag tarkibdan: indeks shunchaki qayta qurilganda (max_age) klient keshi saqlanadi
+        return CatalogPage(key, body, make_etag(body.decode()))
+
+    def invalidate(self):
+        self._page = None
+
+
+themes = CatalogCache(lambda: Theme.objects.order_by('name'), ThemeSerializer, 'by_theme')
+tickets = CatalogCache(lambda: Ticket.objects.order_by('id'), TicketSerializer, 'by_ticket')
+
+
+def catalog_changed():
+    """Admin wrote a Theme/Ticket: rebuild both lists (other workers follow the version, see above)."""
+    themes.invalidate()
+    tickets.invalidate()
+    versions.bump_version(VERSION_NAME)
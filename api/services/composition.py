@@ -0,0 +1,83 @@
+# api/services/composition.py
+"""
+Exam composition policies. Each policy picks test ids from the precomputed
+active-test buckets (api/services/test_index.py) without touching the database.
+"""
+import random
+
+from api.services.test_index import active_tests
+
+DEFAULT_POLICY = 'uniform'
+
+
+class CompositionError(ValueError):
+    pass
+
+
+def uniform(snapshot, count, **options):
+    """Bir xil ehtimollik bilan butun bazadan (hozirgi xatti-harakat)."""
+    if len(snapshot.ids) < count:
+        raise CompositionError(f"Faqat {len(snapshot.ids)} ta test mavjud")
+    return random.sample(snapshot.ids, count)
+
+
+def per_theme(snapshot, count, per_theme=None, **options):
+    """N questions from every theme (N = per_theme, or count split evenly)."""
+    buckets = {theme_id: ids for theme_id, ids in snapshot.by_theme.items() if theme_id is not None and ids}
+    if not buckets:
+        raise CompositionError("Mavzularda testlar mavjud emas")
+    if per_theme is None or per_theme == '':
+        n = max(count // len(buckets), 1)
+    else:
+        try:
+            n = int(per_theme)
+        except (TypeError, ValueError):
+            raise CompositionError("per_theme butun son bo'lishi kerak")
+        if n < 1:
+            raise CompositionError("per_theme 1 dan kichik bo'lmasligi kerak")
+    short = [theme_id for theme_id, ids in buckets.items() if len(ids) < n]
+    if short:
+        raise CompositionError(f"Ba'zi mavzularda {n} tadan kam test bor: {short}")
+    picked = [test_id for ids in buckets.values() for test_id in random.sample(ids, n)]
+    random.shuffle(picked)
+    return picked
+
+
+def weighted(snapshot, count, **options):
+    """`count` questions split across themes proportionally to their bank size."""
+    # Mavzusiz testlar (theme_id None) mavzular bo'yicha taqsimotga kirmaydi
+    buckets = {theme_id: ids for theme_id, ids in snapshot.by_theme.items() if theme_id is not None and ids}
+    total = sum(len(ids) for ids in buckets.values())
+    if total < count:
+        raise CompositionError(f"Mavzularda faqat {total} ta test mavjud")
+
+    # Largest remainder: avval butun qismlar, qolganlari eng katta qoldiqlarga
+    quotas = {theme_id: count * len(ids) / total for theme_id, ids in buckets.items()}
+    allocation = {theme_id: int(quota) for theme_id, quota in quotas.items()}
+    remaining = count - sum(allocation.values())
+    for theme_id in sorted(quotas, key=lambda key: quotas[key] - allocation[key], reverse=True)[:remaining]:
+        allocation[theme_id] += 1
+
+    picked = [
+        test_id
+        for theme_id, n in allocation.items() if n
+        for test_id in random.sample(buckets[theme_id], n)
+    ]
+    random.shuffle(picked)
+    return picked
+
+
+POLICIES = {
+    'uniform': uniform,
+    'per_theme': per_theme,
+    'weighted': weighted,
+}
+
+
+def compose(count, policy=DEFAULT_POLICY, **options):
+    """Returns the picked test ids; raises CompositionError when the bank cannot satisfy the policy."""
+    try:
+        func = POLICIES[policy]
+    except KeyError:
+        raise CompositionError(f"Noma'lum policy: {policy}. Mavjud: {', '.join(POLICIES)}")
+    return func(active_tests.snapshot(), count, **options)
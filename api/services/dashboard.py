@@ -0,0 +1,79 @@
+# api/services/dashboard.py
+"""
+Admin dashboard counters, stored as DashboardCounter rows so every worker reads
+the same values. Model signals (api/signals.py) add to them with one F() UPDATE
+per write; reconcile() recounts from the database, periodically (one worker per
+interval) and whenever a counter row is missing.
+
+running_exams is not a counter: it is counted live from result_open_start_idx,
+which holds only open attempts, so exam start / finish write nothing here.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from api import enums
+from api.models import DashboardCounter, Result, Test, Theme, Ticket, User
+
+COUNTERS = ('users', 'themes', 'tickets', 'tests', 'active_tests')
+RECONCILE_LOCK = 'api:dashboard:reconcile'
+
+
+def _querysets():
+    return {
+        'users': User.objects.all(),
+        'themes': Theme.objects.all(),
+        'tickets': Ticket.objects.all(),
+        'tests': Test.objects.all(),
+        'active_tests': Test.objects.filter(active=True),
+    }
+
+
+def running_exams():
+    return Result.objects.filter(test_type=enums.TestChoices.EXAM, finished=False, superseded=False).count()
+
+
+def reconcile(names=COUNTERS):
+    """Recounts the given counters with COUNT(*) and stores them. Returns {name: count}."""
+    querysets = _querysets()
+    counts = {name: querysets[name].count() for name in names}
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(name=name, value=n) for name, n in counts.items()],
+        update_conflicts=True, unique_fields=['name'], update_fields=['value'],
+    )
+    return counts
+
+
+def counters():
+    """All counters: one query for the stored ones, one COUNT over the open exams index."""
+    counts = dict(DashboardCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    missing = [name for name in COUNTERS if name not in counts]
+    if missing:
+        counts.update(reconcile(missing))
+    counts = {name: counts[name] for name in COUNTERS}
+    counts['running_exams'] = running_exams()
+    return counts
+
+
+def adjust(name, delta):
+    if delta:
+        # Qator yo'q bo'lsa hech narsa bo'lmaydi: keyingi o'qish bazadan sanaydi
+        DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def adjust_on_commit(name, delta):
+    """adjust() once the current transaction commits (nothing on rollback)."""
+    if delta:
+        transaction.on_commit(lambda: adjust(name, delta))
+
+
+def reconcile_on_commit(names):
+    transaction.on_commit(lambda: reconcile(names))
+
+
+def run_reconcile():
+    """Entry point for the in-process periodic job; only one worker recounts per interval."""
+    interval = getattr(settings, 'DASHBOARD_RECONCILE_INTERVAL', 300)
+    if cache.add(RECONCILE_LOCK, True, timeout=max(interval - 1, 1)):
+        reconcile()
@@ -0,0 +1,76 @@
+# api/services/deadlines.py
+"""
+Finalizes EXAM attempts whose 25 minutes ran out without an answer or finish call.
+Open exams are read in start_time order (result_open_start_idx), so the earliest
+deadline is always the first row; the scheduler sleeps until it is due.
+"""
+import logging
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import F, Min, Value
+from django.utils.timezone import now
+
+from api import enums
+from api.models import Result
+from api.services import results
+from api.services.exam_state import exam_state
+
+logger = logging.getLogger(__name__)
+
+BatchStats = namedtuple('BatchStats', ['results', 'seconds'])
+
+
+def open_exams():
+    return Result.objects.filter(test_type=enums.TestChoices.EXAM, finished=False, superseded=False)
+
+
+def expired_exams(at=None):
+    return open_exams().filter(start_time__lt=(at or now()) - results.EXAM_DURATION)
+
+
+def next_deadline():
+    """Eng yaqin ochiq exam muddati (yoki None)."""
+    earliest = open_exams().aggregate(earliest=Min('start_time'))['earliest']
+    return earliest + results.EXAM_DURATION if earliest else None
+
+
+def finalize_expired(batch_size=500, at=None):
+    """
+    Finishes expired exams in chunks: one SELECT of ids plus one set-based UPDATE
+    (results.finish) per chunk. end_time is the exam's deadline, not the time the
+    scheduler noticed it. Yields BatchStats per chunk.
+    """
+    at = at or now()
+    queryset = expired_exams(at).order_by('start_time')
+    while True:
+        started = time.perf_counter()
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        if exam_state.enabled:
+            # Xotirada qolgan javoblar avval yoziladi
+            for result_id in ids:
+                exam_state.release(result_id)
+        finished = results.finish(
+            ids, at=F('start_time') + Value(results.EXAM_DURATION), test_type=enums.TestChoices.EXAM,
+        )
+        yield BatchStats(results=finished, seconds=time.perf_counter() - started)
+        if len(ids) < batch_size:
+            return
+
+
+def run_scheduler():
+    """
+    Entry point for the in-process job. Returns the seconds until the next
+    deadline so the job sleeps exactly that long (capped by its interval).
+    """
+    batch_size = getattr(settings, 'EXAM_DEADLINE_BATCH_SIZE', 500)
+    finished = sum(stats.results for stats in finalize_expired(batch_size))
+    if finished:
+        logger.info("Deadline scheduler finished %s expired exam(s)", finished)
+    deadline = next_deadline()
+    if deadline is None:
+        return None
+    return max((deadline - now()).total_seconds(), 0) + 1
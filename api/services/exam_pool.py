@@ -0,0 +1,127 @@
+# api/services/exam_pool.py
+import logging
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils.timezone import now
+
+from api.models import ExamBlueprint
+from api.services import sheets
+from api.services.test_index import active_tests
+
+logger = logging.getLogger(__name__)
+
+
+class ExamPool:
+    """
+    Pool of ready-made exam blueprints (sampled test ids + shuffled variant orders).
+    start_exam claims one with a single conditional UPDATE instead of sampling inline;
+    a background thread tops the pool up once it runs low.
+    """
+
+    def __init__(self, enabled=False, count=20, size=200, refill_threshold=50, invalidate_on_change=True):
+        self.enabled = enabled
+        self.count = count
+        self.size = size
+        self.refill_threshold = refill_threshold
+        self.invalidate_on_change = invalidate_on_change
+        self._claims_since_refill = 0
+        self._refilling = threading.Lock()
+
+    def claim(self, count):
+        """Returns (test_ids, variant_orders) of a claimed blueprint, or None."""
+        if not self.enabled or count != self.count:
+            return None
+        for _ in range(3):
+            candidate = (
+                ExamBlueprint.objects.filter(count=count, claimed_at__isnull=True)
+                .order_by('id').values_list('id', 'test_ids', 'variant_orders').first()
+            )
+            if candidate is None:
+                self.request_refill()
+                return None
+            blueprint_id, test_ids, orders = candidate
+            # Boshqa so'rov bizdan oldin olib qo'ygan bo'lsa, keyingisini sinaymiz
+            if ExamBlueprint.objects.filter(id=blueprint_id, claimed_at__isnull=True).update(claimed_at=now()):
+                self._claims_since_refill += 1
+                if self._claims_since_refill >= self.size - self.refill_threshold:
+                    self.request_refill()
+                return test_ids, orders
+        return None
+
+    def refill(self):
+        """Drops claimed blueprints and tops the pool up to `size`; returns how many were created."""
+        self._claims_since_refill = 0
+        ExamBlueprint.objects.filter(claimed_at__isnull=False).delete()
+        available = ExamBlueprint.objects.filter(count=self.count, claimed_at__isnull=True).count()
+        missing = self.size - available
+        if missing <= 0 or len(active_tests.all_ids()) < self.count:
+            return 0
+
+        picks = [active_tests.sample(self.count) for _ in range(missing)]
+        variants = sheets.load_variant_ids({test_id for pick in picks for test_id in pick})
+        ExamBlueprint.objects.bulk_create([
+            ExamBlueprint(test_ids=pick, variant_orders=sheets.shuffled_orders(pick, variants), count=self.count)
+            for pick in picks
+        ], batch_size=500)
+        return missing
+
+    def request_refill(self):
+        """Starts a background refill unless one is already running."""
+        if not self.enabled or not self._refilling.acquire(blocking=False):
+            return
+        threading.Thread(target=self._refill_in_background, name='exam-pool-refill', daemon=True).start()
+
+    def _refill_in_background(self):
+        try:
+            close_old_connections()
+            self.refill()
+        except Exception:
+            logger.exception("Exam pool refill failed")
+        finally:
+            connection.close()
+            self._refilling.release()
+
+    def invalidate(self):
+        """Question bank changed: unclaimed blueprints may point at stale tests/variants."""
+        if not self.invalidate_on_change:
+            return
+        ExamBlueprint.objects.filter(claimed_at__isnull=True).delete()
+        self.request_refill()
+
+
+TicketTemplate = namedtuple('TicketTemplate', ['snapshot', 'test_ids', 'variants'])
+
+
+class TicketTemplates:
+    """
+    Per-ticket start template (active test ids + their variant ids).
+    A template lives as long as the active-test index snapshot it was built from.
+    """
+
+    def __init__(self):
+        self._templates = {}
+
+    def get(self, ticket_id):
+        snapshot = active_tests.snapshot()
+        template = self._templates.get(ticket_id)
+        if template is None or template.snapshot is not snapshot:
+            test_ids = list(snapshot.by_ticket.get(ticket_id, ()))
+            template = TicketTemplate(snapshot, test_ids, sheets.load_variant_ids(test_ids))
+            self._templates[ticket_id] = template
+        return template
+
+    def clear(self):
+        self._templates.clear()
+
+
+exam_pool = ExamPool(
+    enabled=getattr(settings, 'EXAM_POOL_ENABLED', False),
+    count=getattr(settings, 'EXAM_POOL_COUNT', 20),
+    size=getattr(settings, 'EXAM_POOL_SIZE', 200),
+    refill_threshold=getattr(settings, 'EXAM_POOL_REFILL_THRESHOLD', 50),
+    invalidate_on_change=getattr(settings, 'EXAM_POOL_INVALIDATE_ON_CHANGE', True),
+)
+ticket_templates = TicketTemplates()
@@ -0,0 +1,360 @@
+# api/services/exam_state.py
+"""
+Optional write-behind store for in-progress attempts (EXAM_STATE_ENABLED).
+
+The first answer of an attempt loads its Result and TestSheets into memory;
+later answers are checked and acknowledged from memory, appended to an
+append-only log (EXAM_STATE_LOG) and written to TestSheet / Result in batches.
+On finish, supersede or the 3rd incorrect answer the attempt is flushed first.
+After a crash, recover() replays the log; replaying is idempotent.
+
+The store lives in one process: run a single worker process while it is enabled.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, F, IntegerField, Value, When
+from django.http import Http404
+
+from api.models import Result, TestSheet, Variant
+from api.flat_serializers import flat
+from api.serializers import VariantSerializer
+from api.services import results
+from api.services.answers import checked_variant_id
+from api.services.question_stats import recorder
+
+logger = logging.getLogger(__name__)
+
+
+class SheetState:
+    __slots__ = ('id', 'test_id', 'variant_orders', 'correct_answer_id', 'correct_answer', 'selected')
+
+    def __init__(self, sheet):
+        self.id = sheet.id
+        self.test_id = sheet.test_id
+        self.variant_orders = sheet.variant_orders
+        self.correct_answer_id = sheet.test.correct_answer_id
+        self.correct_answer = flat(VariantSerializer).one(sheet.test.correct_answer)
+        self.selected = sheet.selected
+
+
+class Attempt:
+    __slots__ = (
+        'result_id', 'user_id', 'test_type', 'start_time', 'test_length',
+        'true_answers', 'incorrect_answers', 'finished', 'sheets', 'last_seen',
+    )
+
+    def __init__(self, result, sheets):
+        self.result_id = result.id
+        self.user_id = result.user_id
+        self.test_type = result.test_type
+        self.start_time = result.start_time
+        self.test_length = result.test_length
+        self.true_answers = result.true_answers
+        self.incorrect_answers = result.incorrect_answers
+        self.finished = result.finished or result.superseded
+        self.sheets = {sheet.id: SheetState(sheet) for sheet in sheets}
+        self.last_seen = time.monotonic()
+
+
+class ExamStateStore:
+    batch_size = 300
+
+    def __init__(self, enabled=False, log_path=None, fsync=False,
+                 flush_interval=2, flush_threshold=200, idle_seconds=3600):
+        self.enabled = enabled
+        self.log_path = str(log_path) if log_path else None
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.idle_seconds = idle_seconds
+        self._attempts = {}
+        self._sheet_owner = {}
+        self._pending = {}  # sheet_id -> (result_id, variant_id, successful)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._log = None
+        self._recovered = False
+
+    # Log
+    ##########################################################################
+
+    def _append(self, record):
+        if not self.log_path:
+            return
+        if self._log is None:
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+        self._log.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def _compact(self):
+        """Log faqat hali bazaga yozilmagan javoblarni saqlaydi (lock ostida chaqiriladi)."""
+        if not self.log_path:
+            return
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        tmp_path = self.log_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            for sheet_id, (result_id, variant_id, successful) in self._pending.items():
+                fh.write(json.dumps({'r': result_id, 's': sheet_id, 'v': variant_id, 'ok': successful},
+                                    separators=(',', ':')) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    def recover(self):
+        """Replays answers left in the log by a crashed process. Returns the number of sheets written."""
+        if not self.log_path or not os.path.exists(self.log_path):
+            return 0
+        replayed = 0
+        with self._lock:
+            with open(self.log_path, encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                        self._pending.setdefault(record['s'], (record['r'], record['v'], record['ok']))
+                        replayed += 1
+                    except (ValueError, KeyError):
+                        # Yarim yozilgan oxirgi qator (crash paytida)
+                        logger.warning("Skipping damaged exam state log line: %r", line)
+        written = self.flush()
+        if replayed:
+            logger.info("Recovered %s answer(s) from %s, %s written", replayed, self.log_path, written)
+        return written
+
+    # Attempts
+    ##########################################################################
+
+    def _load(self, user, sheet_id):
+        """Sheet egasi bo'lgan attemptni xotiradan yoki bazadan (2 ta so'rov) oladi."""
+        with self._lock:
+            result_id = self._sheet_owner.get(sheet_id)
+            attempt = self._attempts.get(result_id)
+        if attempt is not None:
+            if attempt.user_id != user.id:
+                raise Http404("No TestSheet matches the given query.")
+            return attempt
+
+        result_id = TestSheet.objects.filter(id=sheet_id, result__user=user).values_list('result_id', flat=True).first()
+        if result_id is None:
+            raise Http404("No TestSheet matches the given query.")
+        result = Result.objects.get(id=result_id)
+        sheets = TestSheet.objects.filter(result_id=result_id).select_related('test__correct_answer')
+        attempt = Attempt(result, sheets)
+        with self._lock:
+            attempt = self._attempts.setdefault(result_id, attempt)
+            for pk in attempt.sheets:
+                self._sheet_owner[pk] = result_id
+        return attempt
+
+    def _forget(self, result_id):
+        attempt = self._attempts.pop(result_id, None)
+        if attempt is not None:
+            for pk in attempt.sheets:
+                self._sheet_owner.pop(pk, None)
+
+    def release(self, result_id):
+        """Writes the attempt's pending answers and drops it from memory."""
+        try:
+            result_id = int(result_id)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._forget(result_id)
+        self.flush()
+
+    def release_user(self, user_id):
+        """Releases every attempt of the user (before a new test supersedes them)."""
+        with self._lock:
+            result_ids = [pk for pk, attempt in self._attempts.items() if attempt.user_id == user_id]
+            for result_id in result_ids:
+                self._forget(result_id)
+        if result_ids:
+            self.flush()
+
+    def sync(self, result_id):
+        """Writes pending answers before the attempt is read from the database (detail / resume)."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            pending = any(entry[0] == result_id for entry in self._pending.values())
+        return self.flush() if pending else 0
+
+    def close(self, result_id, **conditions):
+        """Flushes and finishes the attempt (results.finish), returns rows finished."""
+        self.release(result_id)
+        return results.finish([result_id], **conditions)
+
+    # Answers
+    ##########################################################################
+
+    def submit(self, user, sheet_id, variant_id):
+        """Same contract as answers.submit_answer(), acknowledged from memory."""
+        try:
+            sheet_id = int(sheet_id)
+        except (TypeError, ValueError):
+            raise Http404("No TestSheet matches the given query.")
+        attempt = self._load(user, sheet_id)
+
+        with self._lock:
+            if attempt.finished:
+                return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+            sheet = attempt.sheets[sheet_id]
+            variant_id = checked_variant_id(sheet, variant_id)
+            attempt.last_seen = time.monotonic()
+
+            expired = results.exam_expired(attempt.test_type, attempt.start_time)
+            if not expired:
+                if sheet.selected:
+                    return {"error": "TestSheet ga variant belgilangan"}, 400
+                successful = variant_id == sheet.correct_answer_id
+                self._append({'r': attempt.result_id, 's': sheet.id, 'v': variant_id, 'ok': successful})
+                sheet.selected = True
+                self._pending[sheet.id] = (attempt.result_id, variant_id, successful)
+                if successful:
+                    attempt.true_answers += 1
+                else:
+                    attempt.incorrect_answers += 1
+                attempt.finished = attempt.incorrect_answers >= results.MAX_INCORRECT
+            finished = attempt.finished
+            due = (
+                len(self._pending) >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+        # 25 minut tugagan bo'lsa
+        if expired:
+            if not self.close(attempt.result_id, test_type=attempt.test_type):
+                return {"error": "Test allaqachon tugatilgan", "finished": True}, 400
+            true_answers = Result.objects.values_list('true_answers', flat=True).get(id=attempt.result_id)
+            return {
+                "message": "Test tugatildi",
+                "result_id": attempt.result_id,
+                "true_answers": true_answers,
+                "test_length": attempt.test_length, "finished": True
+            }, 200
+
+        # 3-noto'g'ri javobda test yakunlanadi
+        if finished:
+            self.close(attempt.result_id, test_type=attempt.test_type, incorrect_answers__gte=results.MAX_INCORRECT)
+            return {"error": "Test yakunlandi!", "finished": True}, 200
+
+        if due:
+            self.flush()
+        return {
+            "message": "Javob saqlandi",
+            "testsheet_id": sheet.id,
+            "correct_answer": sheet.correct_answer,
+            "successful": successful
+        }, 200
+
+    # Flush
+    ##########################################################################
+
+    def flush(self):
+        """Writes pending answers with set-based UPDATEs, returns the number of sheets written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+                self._evict_idle()
+            if not pending:
+                return 0
+            try:
+                written = self._write(pending)
+            except Exception:
+                # Keyingi flush qayta urinadi; log o'zgarmaydi
+                with self._lock:
+                    for sheet_id, entry in pending.items():
+                        self._pending.setdefault(sheet_id, entry)
+                raise
+            with self._lock:
+                self._compact()
+            return written
+
+    def _write(self, pending):
+        with transaction.atomic():
+            # Qayta ishlatilganda (recover) allaqachon yozilganlar o'tkazib yuboriladi
+            done = set(TestSheet.objects.filter(id__in=pending, selected=True).values_list('id', flat=True))
+            live = dict(Variant.objects.filter(
+                id__in={variant_id for _, variant_id, _ in pending.values()}
+            ).values_list('id', 'test_id'))
+            items = [
+                (sheet_id, entry) for sheet_id, entry in pending.items()
+                if sheet_id not in done and entry[1] in live
+            ]
+            if len(items) + len(done) < len(pending):
+                logger.warning("Dropping %s answer(s) whose variant was deleted", len(pending) - len(items) - len(done))
+
+            true_counts, incorrect_counts = Counter(), Counter()
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i:i + self.batch_size]
+                TestSheet.objects.filter(id__in=[pk for pk, _ in batch], selected=False).update(
+                    current_answer_id=Case(
+                        *[When(id=pk, then=Value(variant_id)) for pk, (_, variant_id, _) in batch],
+                        output_field=IntegerField(),
+                    ),
+                    successful=Case(
+                        *[When(id=pk, then=Value(ok)) for pk, (_, _, ok) in batch],
+                        output_field=BooleanField(),
+                    ),
+                    selected=True,
+                )
+                for _, (result_id, _, ok) in batch:
+                    (true_counts if ok else incorrect_counts)[result_id] += 1
+            recorder.record_on_commit([(live[variant_id], variant_id, ok) for _, (_, variant_id, ok) in items])
+
+            result_ids = set(true_counts) | set(incorrect_counts)
+            if result_ids:
+                Result.objects.filter(id__in=result_ids).update(
+                    true_answers=F('true_answers') + Case(
+                        *[When(id=pk, then=Value(n)) for pk, n in true_counts.items()],
+                        default=Value(0), output_field=IntegerField(),
+                    ),
+                    incorrect_answers=F('incorrect_answers') + Case(
+                        *[When(id=pk, then=Value(n)) for pk, n in incorrect_counts.items()],
+                        default=Value(0), output_field=IntegerField(),
+                    ),
+                )
+        return len(items)
+
+    def run(self):
+        """Entry point for the in-process periodic job (the first run replays the log)."""
+        if not self._recovered:
+            self._recovered = True
+            self.recover()
+        else:
+            self.flush()
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_seconds
+        for result_id in [pk for pk, a in self._attempts.items() if a.last_seen < deadline]:
+            self._forget(result_id)
+
+    def __len__(self):
+        return len(self._attempts)
+
+
+def _store():
+    return ExamStateStore(
+        enabled=getattr(settings, 'EXAM_STATE_ENABLED', False),
+        log_path=getattr(settings, 'EXAM_STATE_LOG', None),
+        fsync=getattr(settings, 'EXAM_STATE_FSYNC', False),
+        flush_interval=getattr(settings, 'EXAM_STATE_FLUSH_INTERVAL', 2),
+        flush_threshold=getattr(settings, 'EXAM_STATE_FLUSH_THRESHOLD', 200),
+    )
+
+
+exam_state = _store()
+atexit.register(exam_state.flush)
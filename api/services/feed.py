@@ -0,0 +1,75 @@
+# api/services/feed.py
+"""
+Finished EXAM results feed, newest first, keyset-paginated on (end_time, id).
+One query per page: only the listed columns plus the joined user name,
+served by result_feed_idx / result_user_feed_idx.
+"""
+from datetime import datetime, time, timedelta, timezone
+
+from django.db.models import Q
+from django.utils.timezone import make_aware
+
+from api import enums
+from api.models import Result
+from api.services.stats import PASS_SCORE
+
+COLUMNS = ('id', 'user__full_name', 'test_length', 'true_answers', 'end_time', 'test_type')
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class FeedError(ValueError):
+    pass
+
+
+def encode_cursor(end_time, result_id):
+    # Mikrosekundlar: URL da '+' / ':' muammosiz va aniq
+    return f"{(end_time - EPOCH) // timedelta(microseconds=1)}_{result_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, result_id = cursor.split('_', 1)
+        return EPOCH + timedelta(microseconds=int(micros)), int(result_id)
+    except ValueError:
+        raise FeedError("Noto'g'ri cursor")
+
+
+def results(user_id=None, date_from=None, date_to=None, passed=None):
+    """Filtered feed queryset (dates are inclusive, by end_time)."""
+    rows = Result.objects.filter(test_type=enums.TestChoices.EXAM, finished=True, end_time__isnull=False)
+    if user_id is not None:
+        rows = rows.filter(user_id=user_id)
+    # Sana oralig'i joriy timezone dagi kun chegaralariga aylantiriladi (indeks ishlashi uchun)
+    if date_from is not None:
+        rows = rows.filter(end_time__gte=make_aware(datetime.combine(date_from, time.min)))
+    if date_to is not None:
+        rows = rows.filter(end_time__lt=make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+    if passed is not None:
+        rows = rows.filter(true_answers__gte=PASS_SCORE) if passed else rows.filter(true_answers__lt=PASS_SCORE)
+    return rows.order_by('-end_time', '-id')
+
+
+def page(queryset, limit, cursor=None):
+    """Returns (rows, next_cursor) where rows are dicts of COLUMNS."""
+    if cursor:
+        end_time, result_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(end_time__lt=end_time) | Q(end_time=end_time, id__lt=result_id))
+    rows = list(queryset.values(*COLUMNS)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last['end_time'], last['id'])
+    return rows[:limit], next_cursor
+
+
+def item(row):
+    return {
+        "id": row['id'],
+        "name": row['user__full_name'],
+        "all": row['test_length'],
+        "trues": row['true_answers'],
+        "end_time": row['end_time'].strftime("%H:%M:%S"),
+        "test_type": row['test_type'],
+        "status": row['true_answers'] >= PASS_SCORE
+    }
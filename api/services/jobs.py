@@ -0,0 +1,94 @@
+# api/services/jobs.py
+import logging
+import os
+import sys
+import threading
+
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """
+    Runs func() every `interval` seconds in a daemon thread.
+    func() may return a shorter delay (seconds) until its next run.
+    """
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                close_old_connections()
+                requested = self.func()
+                if requested is not None:
+                    delay = min(requested, self.interval)
+            except Exception:
+                logger.exception("Periodic job %s failed", self.name)
+            finally:
+                connection.close()
+
+
+def is_management_command():
+    """True for manage.py commands other than runserver (migrate, shell, ...)."""
+    return os.path.basename(sys.argv[0]) == 'manage.py' and 'runserver' not in sys.argv
+
+
+_jobs = []
+
+
+def start_background_jobs():
+    """Starts the in-process jobs enabled in settings (called from ApiConfig.ready)."""
+    from django.conf import settings
+
+    if _jobs or is_management_command():
+        return
+
+    interval = getattr(settings, 'RESULT_REAPER_INTERVAL', None)
+    if interval:
+        from api.services.reaper import run_reaper
+        _jobs.append(PeriodicJob('result-reaper', interval, run_reaper))
+
+    interval = getattr(settings, 'EXAM_DEADLINE_INTERVAL', None)
+    if interval:
+        from api.services.deadlines import run_scheduler
+        _jobs.append(PeriodicJob('exam-deadlines', interval, run_scheduler))
+
+    if getattr(settings, 'EXAM_STATE_ENABLED', False):
+        from api.services.exam_state import exam_state
+        _jobs.append(PeriodicJob('exam-state-flush', exam_state.flush_interval, exam_state.run))
+
+    from api.services.activity import session_activity
+    _jobs.append(PeriodicJob('session-activity-flush', session_activity.interval, session_activity.run))
+
+    if getattr(settings, 'QUESTION_STATS_ENABLED', True):
+        from api.services.question_stats import recorder
+        _jobs.append(PeriodicJob('question-stats-flush', recorder.interval, recorder.run))
+
+    if getattr(settings, 'EXAM_ACTIVITY_ENABLED', True):
+        from api.services.rollups import exam_activity
+        _jobs.append(PeriodicJob('exam-activity-flush', exam_activity.interval, exam_activity.run))
+
+    interval = getattr(settings, 'DASHBOARD_RECONCILE_INTERVAL', 300)
+    if interval:
+        from api.services.dashboard import run_reconcile
+        _jobs.append(PeriodicJob('dashboard-reconcile', interval, run_reconcile))
+
+    for job in _jobs:
+        job.start()
@@ -0,0 +1,69 @@
+# api/services/leaderboard.py
+"""
+All-users leaderboard read from UserExamStats (kept up to date on exam finish).
+Every sort has its own (-value, user) index, so a page or a top-K list is one
+indexed query with a join to User, however many results are stored.
+"""
+from django.db.models import Q
+
+from api.models import UserExamStats
+
+SORTS = {
+    'average': 'average_percent',
+    'best': 'best_score',
+    'attempts': 'exam_count',
+}
+DEFAULT_SORT = 'average'
+
+
+class LeaderboardError(ValueError):
+    pass
+
+
+def _cursor_value(field, raw):
+    return float(raw) if field == 'average_percent' else int(raw)
+
+
+def page(sort=DEFAULT_SORT, limit=None, cursor=None):
+    """
+    Rows ordered by the sort value (desc), ties by user id.
+    `cursor` is the "value:user_id" of the last row of the previous page.
+    Returns (rows, next_cursor); next_cursor is None on the last page or without a limit.
+    """
+    try:
+        field = SORTS[sort]
+    except KeyError:
+        raise LeaderboardError(f"Noma'lum sort: {sort}. Mavjud: {', '.join(SORTS)}")
+
+    rows = UserExamStats.objects.select_related('user').order_by(f'-{field}', 'user_id')
+    if cursor:
+        try:
+            raw_value, raw_user = cursor.rsplit(':', 1)
+            value, user_id = _cursor_value(field, raw_value), int(raw_user)
+        except ValueError:
+            raise LeaderboardError("Noto'g'ri cursor")
+        rows = rows.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'user_id__gt': user_id}))
+
+    if limit is None:
+        return list(rows), None
+    rows = list(rows[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{getattr(last, field)!r}:{last.user_id}"
+    return rows[:limit], next_cursor
+
+
+def item(row):
+    return {
+        "id": row.user_id,
+        "name": row.user.full_name,
+        "total_tests": row.exam_count,
+        "total_correct": row.true_answers,
+        "total_incorrect": row.incorrect_answers,
+        "average_score": round(row.average_score),
+        "average_percent": round(row.average_percent, 1),
+        "total_questions": row.questions,
+        "best_score": row.best_score,
+        "pass_count": row.pass_count,
+    }
@@ -0,0 +1,74 @@
+# api/services/question_cache.py
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+from api.services import versions
+from api.services.test_index import VERSION_NAME
+
+# Bitta savolning tayyor (serializatsiya qilingan) qismi
+Fragment = namedtuple('Fragment', ['value', 'image', 'variants', 'correct_answer_id'])
+
+
+class QuestionCache:
+    """
+    test id -> pre-rendered Fragment (text, image url, VariantSerializer data by variant id).
+    Entries belong to one question bank version; question_bank_changed() bumps it,
+    so admin writes to Test/Variant drop every fragment at once (other workers
+    notice the new version within VERSION_CHECK_INTERVAL seconds).
+    """
+
+    def __init__(self, max_size=20000, enabled=True):
+        self.max_size = max_size
+        self.enabled = enabled
+        self._version = None
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, test_ids):
+        """Fragments for the given tests; misses are built with two queries."""
+        version = versions.get_version(VERSION_NAME)
+        with self._lock:
+            if self._version != version or not self.enabled:
+                self._version, self._fragments = version, {}
+            fragments = self._fragments
+        found = {test_id: fragments[test_id] for test_id in test_ids if test_id in fragments}
+        missing = [test_id for test_id in test_ids if test_id not in found]
+        if missing:
+            built = self._build(missing)
+            found.update(built)
+            with self._lock:
+                if self._version == version:
+                    if len(self._fragments) + len(built) > self.max_size:
+                        self._fragments = {}
+                    self._fragments.update(built)
+        return found
+
+    def _build(self, test_ids):
+        from api.flat_serializers import flat
+        from api.models import Test, Variant
+        from api.serializers import VariantSerializer
+
+        variants = {test_id: {} for test_id in test_ids}
+        for data in flat(VariantSerializer).many(Variant.objects.filter(test_id__in=test_ids).order_by('test_id', 'id')):
+            variants[data['test']][data['id']] = data
+        return {
+            test.id: Fragment(
+                value=test.value,
+                image=test.image.url if test.image and test.image.name else None,
+                variants=variants[test.id],
+                correct_answer_id=test.correct_answer_id,
+            )
+            for test in Test.objects.filter(id__in=test_ids).only('id', 'value', 'image', 'correct_answer_id')
+        }
+
+    def clear(self):
+        with self._lock:
+            self._fragments = {}
+
+
+question_cache = QuestionCache(
+    max_size=getattr(settings, 'QUESTION_CACHE_MAX_SIZE', 20000),
+    enabled=getattr(settings, 'QUESTION_CACHE_ENABLED', True),
+)
@@ -0,0 +1,287 @@
+# api/services/question_stats.py
+"""
+Per-question answer analytics (QuestionStats / VariantStats).
+
+Answer paths call recorder.record() once the answer is stored; the counters
+are kept in memory and added to the tables with a few set-based UPDATEs every
+QUESTION_STATS_FLUSH_INTERVAL seconds (or QUESTION_STATS_FLUSH_THRESHOLD answers),
+so reads never aggregate the TestSheet table. rebuild() recomputes everything
+from TestSheet in chunks of tests and is authoritative: a question remembers
+when it was recounted (rebuilt_at) and answers older than that, still buffered
+in any worker, are never added to it.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast
+from django.utils.timezone import now
+
+from api.models import QuestionStats, Test, TestSheet, Variant, VariantStats
+
+class QuestionStatsError(ValueError):
+    pass
+
+
+class QuestionStatsRecorder:
+    """Write-behind answer counters; safe to use from several processes (UPDATEs only add)."""
+    batch_size = 300
+
+    def __init__(self, enabled=True, interval=30, threshold=1000):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold
+        self._events = []  # (at, test_id, variant_id, successful)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, test_id, variant_id, successful, at=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            # Javob vaqti saqlanadi: flush uni savolning rebuilt_at i bilan solishtiradi
+            self._events.append((at or now(), test_id, variant_id, successful))
+            due = (
+                len(self._events) >= self.threshold
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def record_on_commit(self, items):
+        """record() for (test_id, variant_id, successful) items once the current transaction commits."""
+        if not self.enabled or not items:
+            return
+        # Vaqt javob yozilgan tranzaksiya ichida olinadi (commit dan oldin)
+        at = now()
+
+        def record_all():
+            for item in items:
+                self.record(*item, at=at)
+        transaction.on_commit(record_all)
+
+    def flush(self):
+        """Adds pending counters to the tables, returns the number of answers written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                self._last_flush = time.monotonic()
+            if not events:
+                return 0
+            try:
+                self._write(events)
+            except Exception:
+                # Keyingi flush qayta urinadi
+                with self._lock:
+                    self._events[:0] = events
+                raise
+            return len(events)
+
+    def _write(self, events):
+        test_ids = list({test_id for _, test_id, _, _ in events})
+        with transaction.atomic():
+            rebuilt = {}
+            for i in range(0, len(test_ids), self.batch_size):
+                batch = test_ids[i:i + self.batch_size]
+                # Yangi savollar uchun bo'sh qator; qatorlar qulflanadi, parallel rebuild kutadi
+                QuestionStats.objects.bulk_create([QuestionStats(test_id=pk) for pk in batch], ignore_conflicts=True)
+                rebuilt.update(
+                    (test_id, at) for test_id, at in QuestionStats.objects.select_for_update().filter(
+                        test_id__in=batch,
+                    ).values_list('test_id', 'rebuilt_at') if at is not None
+                )
+
+            answered, correct, chosen = Counter(), Counter(), Counter()
+            for at, test_id, variant_id, successful in events:
+                # rebuild bu javobni TestSheet dan allaqachon sanagan
+                if test_id in rebuilt and at < rebuilt[test_id]:
+                    continue
+                answered[test_id] += 1
+                correct[test_id] += bool(successful)
+                chosen[test_id, variant_id] += 1
+
+            test_ids = list(answered)
+            for i in range(0, len(test_ids), self.batch_size):
+                batch = test_ids[i:i + self.batch_size]
+                new_answered = F('answered') + _case(batch, answered)
+                new_correct = F('correct') + _case(batch, correct)
+                test = Test.objects.filter(id=OuterRef('test_id'))
+                QuestionStats.objects.filter(test_id__in=batch).update(
+                    answered=new_answered,
+                    correct=new_correct,
+                    success_rate=Cast(new_correct, FloatField()) / new_answered,
+                    theme_id=Subquery(test.values('theme_id')),
+                    ticket_id=Subquery(test.values('ticket_id')),
+                    updated_at=now(),
+                )
+
+            # O'chirilgan variantlar (javobdan keyin) tashlab yuboriladi
+            live = set(Variant.objects.filter(id__in={v for _, v in chosen}).values_list('id', flat=True))
+            items = [(test_id, variant_id, n) for (test_id, variant_id), n in chosen.items() if variant_id in live]
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i:i + self.batch_size]
+                VariantStats.objects.bulk_create(
+                    [VariantStats(variant_id=v, test_id=t) for t, v, _ in batch], ignore_conflicts=True,
+                )
+                VariantStats.objects.filter(variant_id__in=[v for _, v, _ in batch]).update(
+                    chosen=F('chosen') + _case([v for _, v, _ in batch], {v: n for _, v, n in batch}, 'variant_id'),
+                )
+
+    def run(self):
+        """Entry point for the in-process periodic job."""
+        self.flush()
+
+    def __len__(self):
+        return len(self._events)
+
+
+def _case(keys, counts, field='test_id'):
+    return Case(
+        *[When(**{field: key}, then=Value(counts[key])) for key in keys if counts[key]],
+        default=Value(0), output_field=IntegerField(),
+    )
+
+
+recorder = QuestionStatsRecorder(
+    enabled=getattr(settings, 'QUESTION_STATS_ENABLED', True),
+    interval=getattr(settings, 'QUESTION_STATS_FLUSH_INTERVAL', 30),
+    threshold=getattr(settings, 'QUESTION_STATS_FLUSH_THRESHOLD', 1000),
+)
+atexit.register(recorder.flush)
+
+
+# Read
+##############################################################################
+
+def hardest(limit, cursor=None, theme_id=None, ticket_id=None, min_answers=1):
+    """
+    Lowest success rate first (ties by test id), optionally within one theme or ticket.
+    `cursor` is the "success_rate:test_id" of the last row of the previous page.
+    Returns (rows, next_cursor).
+    """
+    if theme_id is not None and ticket_id is not None:
+        raise QuestionStatsError("theme va ticket dan faqat bittasi beriladi")
+    # Hali javobsiz (rebuild da 0 ga tushgan) qatorlar ko'rsatilmaydi
+    rows = QuestionStats.objects.select_related('test').filter(answered__gte=max(min_answers, 1))
+    if theme_id is not None:
+        rows = rows.filter(theme_id=theme_id)
+    if ticket_id is not None:
+        rows = rows.filter(ticket_id=ticket_id)
+    rows = rows.order_by('success_rate', 'test_id')
+    if cursor:
+        try:
+            raw_rate, raw_test = cursor.rsplit(':', 1)
+            rate, test_id = float(raw_rate), int(raw_test)
+        except ValueError:
+            raise QuestionStatsError("Noto'g'ri cursor")
+        rows = rows.filter(Q(success_rate__gt=rate) | Q(success_rate=rate, test_id__gt=test_id))
+
+    rows = list(rows[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last.success_rate!r}:{last.test_id}"
+    return rows[:limit], next_cursor
+
+
+def items(rows):
+    """Response items with every variant's choice count (one extra query for the page)."""
+    variants = {row.test_id: [] for row in rows}
+    for variant_id, test_id, value, chosen in Variant.objects.filter(test_id__in=variants).order_by(
+        'test_id', 'id'
+    ).values_list('id', 'test_id', 'value', 'answer_stats__chosen'):
+        variants[test_id].append({"id": variant_id, "value": value, "chosen": chosen or 0})
+    return [
+        {
+            "id": row.test_id,
+            "value": row.test.value,
+            "theme": row.theme_id,
+            "ticket": row.ticket_id,
+            "answered": row.answered,
+            "correct": row.correct,
+            "success_percent": round(row.success_rate * 100, 1),
+            "correct_answer": row.test.correct_answer_id,
+            "variants": variants[row.test_id],
+        }
+        for row in rows
+    ]
+
+
+# Rebuild
+##############################################################################
+
+def rebuild(batch_size=500):
+    """
+    Recomputes the counters from TestSheet, `batch_size` tests per chunk
+    (keyset over Test ids, each chunk one transaction). Yields tests written per chunk.
+    Answers still buffered in any worker are handled by rebuilt_at (see _rebuild_chunk).
+    """
+    recorder.flush()
+    last_id = 0
+    while True:
+        tests = list(Test.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'theme_id', 'ticket_id')[:batch_size])
+        if not tests:
+            return
+        last_id = tests[-1][0]
+        yield _rebuild_chunk(tests)
+
+
+def _rebuild_chunk(tests):
+    """
+    Overwrites the chunk's counters with counts from TestSheet. The rows are
+    created and locked first, then stamped with the read time (rebuilt_at):
+    answers older than it are dropped by their flush instead of being counted
+    twice, and a flush waits for the chunk instead of being overwritten by it.
+    """
+    test_ids = [test_id for test_id, _, _ in tests]
+    with transaction.atomic():
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(test_id=pk, theme_id=theme_id, ticket_id=ticket_id) for pk, theme_id, ticket_id in tests],
+            ignore_conflicts=True,
+        )
+        read_at = now()
+        QuestionStats.objects.filter(test_id__in=test_ids).update(
+            rebuilt_at=read_at, answered=0, correct=0, success_rate=0, updated_at=read_at,
+        )
+        return _rebuild_counts(tests, test_ids, read_at)
+
+
+def _rebuild_counts(tests, test_ids, read_at):
+    answered = TestSheet.objects.filter(test_id__in=test_ids, selected=True).order_by()
+    counts = {
+        row['test_id']: row for row in answered.values('test_id').annotate(
+            answered=Count('id'), correct=Count('id', filter=Q(successful=True)),
+        )
+    }
+    rows = [
+        QuestionStats(
+            test_id=test_id, theme_id=theme_id, ticket_id=ticket_id,
+            answered=counts[test_id]['answered'], correct=counts[test_id]['correct'],
+            success_rate=counts[test_id]['correct'] / counts[test_id]['answered'],
+            updated_at=read_at, rebuilt_at=read_at,
+        )
+        for test_id, theme_id, ticket_id in tests if test_id in counts
+    ]
+    variants = [
+        VariantStats(variant_id=row['current_answer_id'], test_id=row['test_id'], chosen=row['chosen'])
+        for row in answered.filter(current_answer__isnull=False).values('test_id', 'current_answer_id').annotate(
+            chosen=Count('id'),
+        )
+    ]
+    # Javobsiz savollar qatori 0 bilan qoladi: rebuilt_at keyingi flush uchun kerak
+    VariantStats.objects.filter(test_id__in=test_ids).exclude(variant_id__in=[v.variant_id for v in variants]).delete()
+    if rows:
+        QuestionStats.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['test'],
+            update_fields=['theme', 'ticket', 'answered', 'correct', 'success_rate', 'updated_at', 'rebuilt_at'],
+        )
+    if variants:
+        VariantStats.objects.bulk_create(
+            variants, update_conflicts=True, unique_fields=['variant'], update_fields=['test', 'chosen'],
+        )
+    return len(rows)
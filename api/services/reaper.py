@@ -0,0 +1,62 @@
+# api/services/reaper.py
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from api import enums
+from api.models import Result
+
+logger = logging.getLogger(__name__)
+
+BatchStats = namedtuple('BatchStats', ['results', 'sheets', 'seconds'])
+
+
+def reapable_results(stale_after=None):
+    """
+    Superseded attempts, plus unfinished ones nobody touched for `stale_after`.
+    Open exams are left alone: the deadline scheduler finishes them instead.
+    """
+    if stale_after is None:
+        stale_after = timedelta(hours=getattr(settings, 'RESULT_REAPER_STALE_HOURS', 24))
+    return Result.objects.filter(finished=False).filter(
+        Q(superseded=True) | (Q(start_time__lt=now() - stale_after) & ~Q(test_type=enums.TestChoices.EXAM))
+    )
+
+
+def reap(batch_size=500, stale_after=None, max_batches=None):
+    """
+    Deletes abandoned unfinished Results (and their TestSheets) in chunks,
+    one short transaction per chunk. Yields BatchStats per chunk.
+    """
+    queryset = reapable_results(stale_after).order_by('id')
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        started = time.perf_counter()
+        with transaction.atomic():
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return
+            _, deleted = Result.objects.filter(id__in=ids).delete()
+        batches += 1
+        yield BatchStats(
+            results=deleted.get('api.Result', 0),
+            sheets=deleted.get('api.TestSheet', 0),
+            seconds=time.perf_counter() - started,
+        )
+
+
+def run_reaper():
+    """Entry point for the in-process periodic job."""
+    batch_size = getattr(settings, 'RESULT_REAPER_BATCH_SIZE', 500)
+    results = sheets = 0
+    for stats in reap(batch_size=batch_size):
+        results += stats.results
+        sheets += stats.sheets
+    if results:
+        logger.info("Reaper removed %s result(s), %s test sheet(s)", results, sheets)
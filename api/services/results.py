@@ -0,0 +1,65 @@
+# api/services/results.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, ExpressionWrapper, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from api import enums
+from api.models import Result, TestSheet
+from api.services import rollups, stats
+
+# EXAM uchun vaqt chegarasi
+EXAM_DURATION = timedelta(minutes=25)
+# Shuncha noto'g'ri javobdan keyin test yakunlanadi
+MAX_INCORRECT = 3
+
+
+def exam_expired(test_type, start_time, at=None):
+    return test_type == enums.TestChoices.EXAM and start_time + EXAM_DURATION < (at or now())
+
+
+def true_answers_subquery():
+    """COUNT of successful sheets for the outer Result row (0 when there are none)."""
+    counts = (
+        TestSheet.objects.filter(result=OuterRef('pk'), successful=True)
+        .order_by().values('result').annotate(n=Count('id')).values('n')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def finish(result_ids, at=None, test_type=None, **conditions):
+    """
+    Finalizes the given unfinished Results with one set-based UPDATE
+    (true_answers recounted from TestSheet). Extra `conditions` narrow the filter;
+    `test_type`, when the caller knows it, skips the EXAM hooks for other types.
+    Returns the number of rows finished.
+    """
+    end_time = at or now()
+    rows = Result.objects.filter(id__in=result_ids, finished=False, superseded=False, **conditions)
+    with transaction.atomic(savepoint=False):
+        exams = None
+        if test_type in (None, enums.TestChoices.EXAM) and rollups.exam_activity.enabled:
+            # Shu UPDATE tugatadigan examlar undan oldin, qulf ostida olinadi:
+            # parallel deadline sweep tugatgan qatorlar bu yerga tushmaydi
+            exams = list(rows.filter(test_type=enums.TestChoices.EXAM).select_for_update().annotate(
+                finish_time=ExpressionWrapper(
+                    end_time if hasattr(end_time, 'resolve_expression') else Value(end_time),
+                    output_field=DateTimeField(),
+                ),
+                finish_true_answers=true_answers_subquery(),
+            ).values_list('id', 'finish_time', 'finish_true_answers'))
+        finished = rows.update(
+            finished=True,
+            end_time=end_time,
+            true_answers=true_answers_subquery(),
+        )
+        if finished and test_type in (None, enums.TestChoices.EXAM):
+            if exams is None:
+                stats.results_finished(result_ids)
+            elif exams:
+                # Tugagan examlar egalarining statistikasi va faollik
+                stats.results_finished([pk for pk, _, _ in exams])
+                rollups.exams_finished([(finish_time, true_answers) for _, finish_time, true_answers in exams])
+    return finished
@@ -0,0 +1,272 @@
+# api/services/rollups.py
+"""
+Daily and hourly EXAM activity (ExamActivity), bucketed in TIME_ZONE.
+
+results.finish() (by end_time) and the supersede on a new start (by the
+abandoned exam's start_time) record events in memory; they are added to the
+buckets with a few set-based UPDATEs every EXAM_ACTIVITY_FLUSH_INTERVAL seconds,
+so the admin time series never scans Result. backfill() recomputes whole days
+from Result and is authoritative: a bucket remembers when it was recounted
+(backfilled_at) and events older than that are never added to it.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import time as day_time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from api import enums
+from api.models import ExamActivity, Result
+from api.services.stats import PASS_SCORE
+
+PERIODS = enums.PeriodChoices
+COUNTERS = ('exams', 'passed', 'true_answers', 'abandoned')
+STEPS = {PERIODS.DAY: timedelta(days=1), PERIODS.HOUR: timedelta(hours=1)}
+
+
+class RollupError(ValueError):
+    pass
+
+
+def bucket_starts(at):
+    """(day start, hour start) of `at` in the current time zone."""
+    hour = timezone.localtime(at).replace(minute=0, second=0, microsecond=0)
+    return hour.replace(hour=0), hour
+
+
+def day_bounds(date_from, date_to):
+    """[start of date_from, start of the day after date_to) as aware datetimes."""
+    return (
+        timezone.make_aware(datetime.combine(date_from, day_time.min)),
+        timezone.make_aware(datetime.combine(date_to + timedelta(days=1), day_time.min)),
+    )
+
+
+class ActivityRollup:
+    """Write-behind bucket counters; safe to use from several processes (UPDATEs only add)."""
+    batch_size = 200
+
+    def __init__(self, enabled=True, interval=30, threshold=500):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold
+        self._events = []  # (at, [exams, passed, true_answers, abandoned])
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def add(self, at, exams=0, passed=0, true_answers=0, abandoned=0):
+        if not self.enabled:
+            return
+        with self._lock:
+            # Hodisa vaqti saqlanadi: flush uni bucket ning backfilled_at i bilan solishtiradi
+            self._events.append((at, (exams, passed, true_answers, abandoned)))
+            due = (
+                len(self._events) >= self.threshold
+                or time.monotonic() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def add_on_commit(self, events):
+        """add(at, **counts) for every (at, counts) event once the current transaction commits."""
+        if not self.enabled or not events:
+            return
+
+        def add_all():
+            for at, counts in events:
+                self.add(at, **counts)
+        transaction.on_commit(add_all)
+
+    def flush(self):
+        """Adds pending events to ExamActivity, returns the number of events written."""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                self._last_flush = time.monotonic()
+            if not events:
+                return 0
+            try:
+                self._write(events)
+            except Exception:
+                # Keyingi flush qayta urinadi
+                with self._lock:
+                    self._events[:0] = events
+                raise
+            return len(events)
+
+    def _write(self, events):
+        keys = {key for at, _ in events for key in zip((PERIODS.DAY, PERIODS.HOUR), bucket_starts(at))}
+        with transaction.atomic():
+            # Yangi oraliqlar uchun bo'sh qator; qatorlar qulflanadi, parallel backfill kutadi
+            ExamActivity.objects.bulk_create(
+                [ExamActivity(period=period, start=start) for period, start in keys],
+                ignore_conflicts=True, batch_size=self.batch_size,
+            )
+            backfilled = {}
+            for period in (PERIODS.DAY, PERIODS.HOUR):
+                starts = [start for p, start in keys if p == period]
+                for i in range(0, len(starts), self.batch_size):
+                    backfilled.update(
+                        ((period, start), at) for start, at in ExamActivity.objects.select_for_update().filter(
+                            period=period, start__in=starts[i:i + self.batch_size], backfilled_at__isnull=False,
+                        ).values_list('start', 'backfilled_at')
+                    )
+
+            deltas = {}
+            for at, counts in events:
+                for key in zip((PERIODS.DAY, PERIODS.HOUR), bucket_starts(at)):
+                    # backfill bu hodisani Result dan allaqachon sanagan
+                    if key in backfilled and at < backfilled[key]:
+                        continue
+                    delta = deltas.setdefault(key, [0] * len(COUNTERS))
+                    for i, n in enumerate(counts):
+                        delta[i] += n
+
+            items = list(deltas.items())
+            for i in range(0, len(items), self.batch_size):
+                batch = items[i:i + self.batch_size]
+                buckets = Q()
+                for (period, start), _ in batch:
+                    buckets |= Q(period=period, start=start)
+                ExamActivity.objects.filter(buckets).update(**{
+                    name: F(name) + Case(
+                        *[When(period=period, start=start, then=Value(delta[j]))
+                          for (period, start), delta in batch if delta[j]],
+                        default=Value(0), output_field=IntegerField(),
+                    )
+                    for j, name in enumerate(COUNTERS)
+                })
+
+    def run(self):
+        """Entry point for the in-process periodic job."""
+        self.flush()
+
+    def __len__(self):
+        return len(self._events)
+
+
+exam_activity = ActivityRollup(
+    enabled=getattr(settings, 'EXAM_ACTIVITY_ENABLED', True),
+    interval=getattr(settings, 'EXAM_ACTIVITY_FLUSH_INTERVAL', 30),
+    threshold=getattr(settings, 'EXAM_ACTIVITY_FLUSH_THRESHOLD', 500),
+)
+atexit.register(exam_activity.flush)
+
+
+# Hooks
+##############################################################################
+
+def exams_finished(rows):
+    """Hook for results.finish(): (end_time, true_answers) of the exams its UPDATE finished."""
+    exam_activity.add_on_commit([
+        (finished_at, {'exams': 1, 'passed': int(true_answers >= PASS_SCORE), 'true_answers': true_answers})
+        for finished_at, true_answers in rows
+    ])
+
+
+def exams_abandoned(start_times):
+    """Hook for the supersede on a new start: start_time of every open exam it abandoned."""
+    exam_activity.add_on_commit([(start_time, {'abandoned': 1}) for start_time in start_times])
+
+
+# Read
+##############################################################################
+
+def series(period, date_from, date_to):
+    """Every bucket of the local days [date_from, date_to], empty ones included."""
+    if period not in STEPS:
+        raise RollupError(f"Noma'lum period: {period}. Mavjud: {', '.join(STEPS)}")
+    if date_from > date_to:
+        raise RollupError("date_from date_to dan keyin bo'lmasligi kerak")
+    start, end = day_bounds(date_from, date_to)
+    max_buckets = getattr(settings, 'EXAM_ACTIVITY_MAX_BUCKETS', 1000)
+    if (end - start) / STEPS[period] > max_buckets:
+        raise RollupError(f"Oraliq juda katta: ko'pi bilan {max_buckets} ta {period.lower()}")
+
+    rows = {row.start: row for row in ExamActivity.objects.filter(period=period, start__gte=start, start__lt=end)}
+    items, at = [], start
+    while at < end:
+        items.append(item(at, rows.get(at)))
+        at += STEPS[period]
+    return items
+
+
+def item(start, row):
+    exams = row.exams if row else 0
+    passed = row.passed if row else 0
+    return {
+        "start": timezone.localtime(start).isoformat(),
+        "exams": exams,
+        "passed": passed,
+        "pass_percent": round(passed * 100 / exams, 1) if exams else 0,
+        "average_score": round(row.true_answers / exams, 1) if exams else 0,
+        "abandoned": row.abandoned if row else 0,
+    }
+
+
+# Backfill
+##############################################################################
+
+def backfill(date_from, date_to):
+    """Recomputes the local days [date_from, date_to] from Result. Yields (day, exams) per day."""
+    exam_activity.flush()
+    day = date_from
+    while day <= date_to:
+        yield day, _backfill_day(day)
+        day += timedelta(days=1)
+
+
+def _backfill_day(day):
+    """
+    Overwrites the day's bucket and its hour buckets with counts from Result.
+    The buckets are created and locked first, then stamped with the read time
+    (backfilled_at): events older than it, still buffered in any worker, are
+    dropped by their flush instead of being counted twice.
+    exams / passed / true_answers come from finished exams (by end_time, result_feed_idx);
+    abandoned from superseded exams still in Result (by start_time; the reaper
+    deletes old ones, so a backfill of reaped days counts fewer).
+    """
+    start, end = day_bounds(day, day)
+    tz = timezone.get_current_timezone()
+    hour_starts = [start + i * STEPS[PERIODS.HOUR] for i in range(int((end - start) / STEPS[PERIODS.HOUR]))]
+    day_buckets = Q(period=PERIODS.DAY, start=start) | Q(period=PERIODS.HOUR, start__gte=start, start__lt=end)
+
+    with transaction.atomic():
+        ExamActivity.objects.bulk_create(
+            [ExamActivity(period=PERIODS.DAY, start=start)]
+            + [ExamActivity(period=PERIODS.HOUR, start=hour) for hour in hour_starts],
+            ignore_conflicts=True,
+        )
+        read_at = timezone.now()
+        ExamActivity.objects.filter(day_buckets).update(backfilled_at=read_at, **{name: 0 for name in COUNTERS})
+
+        hours = {}
+        finished = Result.objects.filter(
+            test_type=enums.TestChoices.EXAM, finished=True, end_time__isnull=False, end_time__gte=start, end_time__lt=end,
+        )
+        for row in finished.annotate(hour=TruncHour('end_time', tzinfo=tz)).order_by().values('hour').annotate(
+            exam_count=Count('id'), pass_count=Count('id', filter=Q(true_answers__gte=PASS_SCORE)), true_sum=Sum('true_answers'),
+        ):
+            hours.setdefault(row['hour'], [0] * len(COUNTERS))[:3] = row['exam_count'], row['pass_count'], row['true_sum']
+
+        abandoned = Result.objects.filter(
+            test_type=enums.TestChoices.EXAM, finished=False, superseded=True, start_time__gte=start, start_time__lt=end,
+        )
+        for row in abandoned.annotate(hour=TruncHour('start_time', tzinfo=tz)).order_by().values('hour').annotate(n=Count('id')):
+            hours.setdefault(row['hour'], [0] * len(COUNTERS))[3] = row['n']
+
+        totals = [sum(counts) for counts in zip(*hours.values())] or [0] * len(COUNTERS)
+        rows = [ExamActivity(period=PERIODS.DAY, start=start, **dict(zip(COUNTERS, totals)))] + [
+            ExamActivity(period=PERIODS.HOUR, start=hour, **dict(zip(COUNTERS, counts))) for hour, counts in hours.items()
+        ]
+        ExamActivity.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['period', 'start'], update_fields=list(COUNTERS),
+        )
+    return totals[0]
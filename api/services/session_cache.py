@@ -0,0 +1,131 @@
+# api/services/session_cache.py
+"""
+Per-worker token -> session cache for the auth decorators.
+
+Invalidations (login, logout, profile / role edits, user deletes) bump the
+shared 'sessions' version (api.services.versions): every snapshot keeps the
+version it was built under, so other workers drop theirs within
+VERSION_CHECK_INTERVAL seconds instead of serving them until the TTL. A bump
+drops every user's snapshot, which costs one session read per active token.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from api.services import versions
+
+VERSION_NAME = 'sessions'
+
+
+class SessionSnapshot(namedtuple('SessionSnapshot', [
+    'session_id', 'user_id', 'user_db', 'user_fields', 'user_values', 'device_info', 'role', 'expires_at', 'version',
+])):
+    """Immutable copy of a UserSession row and its user."""
+
+    def matches_device(self, device_info):
+        return self.device_info == device_info
+
+    def build_user(self):
+        # Har bir so'rov uchun yangi User obyekti (view lar uni o'zgartirishi mumkin)
+        from api.models import User
+        return User.from_db(self.user_db, self.user_fields, self.user_values)
+
+
+class SessionCache:
+    """
+    Thread-safe token -> SessionSnapshot cache with a TTL and an LRU size bound.
+    Entries are dropped on login, logout and user updates, in every worker (see above).
+    """
+
+    def __init__(self, ttl=60, max_size=10000, enabled=True):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.enabled = enabled
+        self._data = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        if not self.enabled:
+            return None
+        with self._lock:
+            snapshot = self._data.get(token)
+            if snapshot is None:
+                return None
+            if snapshot.expires_at < time.monotonic():
+                self._pop(token)
+                return None
+        if snapshot.version != versions.get_version(VERSION_NAME):
+            # Boshqa worker sessiyalarni bekor qilgan
+            self.invalidate(token)
+            return None
+        with self._lock:
+            if token in self._data:
+                self._data.move_to_end(token)
+        return snapshot
+
+    def version(self):
+        """Read before loading a session, so a bump during the load is not missed."""
+        return versions.get_version(VERSION_NAME)
+
+    def set(self, token, session, version=None):
+        user = session.user
+        fields = [f.attname for f in user._meta.concrete_fields]
+        snapshot = SessionSnapshot(
+            session_id=session.id,
+            user_id=user.id,
+            user_db=user._state.db,
+            user_fields=fields,
+            user_values=tuple(getattr(user, name) for name in fields),
+            device_info=session.device_info,
+            role=user.role,
+            expires_at=time.monotonic() + self.ttl,
+            version=self.version() if version is None else version,
+        )
+        if not self.enabled:
+            return snapshot
+        with self._lock:
+            self._pop(token)
+            self._data[token] = snapshot
+            self._by_user.setdefault(user.id, set()).add(token)
+            while len(self._data) > self.max_size:
+                self._pop(next(iter(self._data)))
+        return snapshot
+
+    def invalidate(self, token):
+        with self._lock:
+            self._pop(str(token))
+
+    def invalidate_user(self, user_id):
+        """Drops the user's sessions here and, through the version, in the other workers."""
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._pop(token)
+        versions.bump_version(VERSION_NAME)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _pop(self, token):
+        snapshot = self._data.pop(token, None)
+        if snapshot is not None:
+            tokens = self._by_user.get(snapshot.user_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._by_user[snapshot.user_id]
+        return snapshot
+
+
+session_cache = SessionCache(
+    ttl=getattr(settings, 'SESSION_CACHE_TTL', 60),
+    max_size=getattr(settings, 'SESSION_CACHE_MAX_SIZE', 10000),
+    enabled=getattr(settings, 'SESSION_CACHE_ENABLED', True),
+)
@@ -0,0 +1,74 @@
+# api/services/sheet_detail.py
+"""
+Builds SolveTestDetailView items from TestSheet state rows plus cached question
+fragments (api/services/question_cache.py), either one page at a time or as a
+chunked stream whose memory use does not grow with the number of sheets.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.models import TestSheet
+from api.services.question_cache import question_cache
+from api.services.sheets import ordered_variants
+
+ROW_FIELDS = ('id', 'test_id', 'variant_orders', 'current_answer_id', 'successful')
+
+
+def sheet_rows(result_id, after=None):
+    """Sheet state rows of a Result in id order (keyset: only ids greater than `after`)."""
+    rows = TestSheet.objects.filter(result_id=result_id)
+    if after is not None:
+        rows = rows.filter(id__gt=after)
+    return rows.order_by('id').values_list(*ROW_FIELDS)
+
+
+def render(rows, finished, base_uri):
+    """Detail items for the given rows; question fragments are fetched for the whole batch at once."""
+    fragments = question_cache.get_many({row[1] for row in rows})
+    items = []
+    for sheet_id, test_id, variant_orders, current_answer_id, successful in rows:
+        fragment = fragments.get(test_id)
+        if fragment is None:
+            continue
+        current_answer = fragment.variants.get(current_answer_id)
+        image = fragment.image
+        items.append({
+            "id": sheet_id,
+            "value": fragment.value,
+            "status": successful,
+            "image": base_uri + image if image and image.startswith('/') else image,
+            "current_answer": current_answer,
+            "correct_answer": fragment.variants.get(fragment.correct_answer_id) if (finished or current_answer) else None,
+            # Variantlar sheet yaratilganda belgilangan tartibda
+            "variants": ordered_variants(variant_orders, fragment.variants),
+        })
+    return items
+
+
+def page(result_id, finished, base_uri, limit, after=None):
+    """One keyset page: (items, next_cursor); next_cursor is None on the last page."""
+    rows = list(sheet_rows(result_id, after)[:limit + 1])
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return render(rows[:limit], finished, base_uri), next_cursor
+
+
+def iter_items(result_id, finished, base_uri, after=None, chunk_size=200):
+    """Yields items chunk by chunk from a server-side iterator."""
+    chunk = []
+    for row in sheet_rows(result_id, after).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield from render(chunk, finished, base_uri)
+            chunk = []
+    if chunk:
+        yield from render(chunk, finished, base_uri)
+
+
+def stream_json(items):
+    """JSON array encoder for StreamingHttpResponse (one item per chunk)."""
+    yield b'['
+    for i, item in enumerate(items):
+        prefix = b',' if i else b''
+        yield prefix + json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+    yield b']'
@@ -0,0 +1,72 @@
+# api/services/sheets.py
+import random
+
+from django.db import transaction
+
+from api import enums
+from api.models import Result, TestSheet, Variant
+from api.services import rollups
+from api.services.exam_state import exam_state
+
+
+def load_variant_ids(test_ids):
+    """test_id -> [variant ids] for all given tests, in a single query."""
+    variants = {test_id: [] for test_id in test_ids}
+    rows = Variant.objects.filter(test_id__in=variants).order_by('test_id', 'id').values_list('test_id', 'id')
+    for test_id, variant_id in rows:
+        variants[test_id].append(variant_id)
+    return variants
+
+
+def shuffled_orders(test_ids, variants):
+    """Variantlar tartibini xotirada aralashtiradi (har bir test uchun)."""
+    return [random.sample(variants[test_id], len(variants[test_id])) for test_id in test_ids]
+
+
+def ordered_variants(variant_orders, variants):
+    """
+    `variants` ({id: variant}, id order) in the sheet's stored order. Variants added after
+    the sheet was created go to the end, deleted ones are skipped; nothing is written back.
+    """
+    by_id = dict(variants)
+    ordered = [by_id.pop(variant_id) for variant_id in variant_orders or () if variant_id in by_id]
+    return ordered + list(by_id.values())
+
+
+def create_result(user, description, test_type, test_ids, variants=None, orders=None):
+    """
+    Supersedes the user's unfinished attempt with a new Result and bulk-creates its
+    TestSheets (with shuffled variant orders) in one transaction.
+    `variants` / `orders` can be passed in when they are already known (templates, exam pool).
+    """
+    if orders is None:
+        if variants is None:
+            variants = load_variant_ids(test_ids)
+        orders = shuffled_orders(test_ids, variants)
+
+    if exam_state.enabled:
+        # Xotiradagi eski attempt javoblari supersede dan oldin yoziladi
+        exam_state.release_user(user.id)
+
+    with transaction.atomic():
+        # Old not finished tests: arzon UPDATE, o'chirishni reaper bajaradi
+        open_attempts = Result.objects.filter(user=user, finished=False, superseded=False)
+        # Tashlab ketilgan examlar (start_time bo'yicha faollikka), qulf ostida
+        abandoned = list(open_attempts.filter(test_type=enums.TestChoices.EXAM).select_for_update().values_list(
+            'start_time', flat=True,
+        ))
+        open_attempts.update(superseded=True)
+        rollups.exams_abandoned(abandoned)
+
+        result = Result.objects.create(
+            user=user,
+            description=description,
+            test_length=len(test_ids),
+            true_answers=0,
+            test_type=test_type,
+        )
+        TestSheet.objects.bulk_create([
+            TestSheet(result=result, test_id=test_id, variant_orders=order)
+            for test_id, order in zip(test_ids, orders)
+        ])
+    return result
@@ -0,0 +1,150 @@
+# api/services/signed_tokens.py
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+TOKEN_SALT = 'api.signed_tokens'
+
+
+def device_hash(device_info):
+    return hashlib.sha256((device_info or '').encode()).hexdigest()[:16]
+
+
+def is_signed_token(token):
+    # uuid tokenlarda ':' bo'lmaydi, signing.dumps() natijasida esa bor
+    return ':' in token
+
+
+class TokenClaims(namedtuple('TokenClaims', ['user_id', 'role', 'is_staff', 'device', 'generation', 'issued_at'])):
+    """Verified payload of a signed access token."""
+    session_id = None
+
+    def matches_device(self, device_info):
+        return self.device == device_hash(device_info)
+
+    def build_user(self):
+        # Faqat token ichidagi maydonlar; qolganlari kerak bo'lsa bazadan (deferred) yuklanadi
+        from api.models import User
+        return User.from_db('default', ['id', 'role', 'is_staff'], [self.user_id, self.role, self.is_staff])
+
+
+class GenerationRegistry:
+    """
+    In-memory copy of the SessionGeneration table.
+    Only rows changed since the last sync are re-read, at most every `refresh_interval` seconds.
+    The read starts `overlap` seconds before the newest updated_at seen: a bump whose
+    transaction commits after a later one (earlier timestamp) is still picked up.
+    A token newer than the copy was issued by another worker: see accepts().
+    """
+
+    def __init__(self, refresh_interval=5, overlap=60):
+        self.refresh_interval = refresh_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._generations = {}
+        self._watermark = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def current(self, user_id):
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.refresh_interval:
+            self.sync()
+        return self._generations.get(user_id, 0)
+
+    def accepts(self, user_id, generation):
+        """False only when the user has a newer generation than the token (revoked or replaced)."""
+        current = self.current(user_id)
+        if generation > current:
+            # Token boshqa workerda berilgan, bu nusxa hali eskisini ko'radi
+            self.sync()
+            with self._lock:
+                current = self._generations.get(user_id, 0)
+                if generation > current:
+                    # Imzolangan token: bu generation bazada allaqachon bor
+                    self._generations[user_id] = current = generation
+        return generation == current
+
+    def sync(self):
+        from api.models import SessionGeneration
+
+        with self._lock:
+            rows = SessionGeneration.objects.all()
+            if self._watermark is not None:
+                rows = rows.filter(updated_at__gte=self._watermark - self.overlap)
+            for user_id, generation, updated_at in rows.values_list('user_id', 'generation', 'updated_at'):
+                self._generations[user_id] = generation
+                if self._watermark is None or updated_at > self._watermark:
+                    self._watermark = updated_at
+            self._synced_at = time.monotonic()
+
+    def bump(self, user_id):
+        """Invalidates every token issued to the user, returns the new generation."""
+        from api.models import SessionGeneration
+
+        with transaction.atomic():
+            row, created = SessionGeneration.objects.select_for_update().get_or_create(
+                user_id=user_id, defaults={'generation': 1}
+            )
+            if not created:
+                SessionGeneration.objects.filter(user_id=user_id).update(
+                    generation=F('generation') + 1, updated_at=now()
+                )
+                row.refresh_from_db(fields=['generation'])
+        with self._lock:
+            self._generations[user_id] = row.generation
+        return row.generation
+
+    def clear(self):
+        with self._lock:
+            self._generations.clear()
+            self._watermark = None
+            self._synced_at = None
+
+
+generations = GenerationRegistry(
+    refresh_interval=getattr(settings, 'SIGNED_TOKEN_GENERATION_REFRESH', 5),
+    overlap=getattr(settings, 'SIGNED_TOKEN_GENERATION_OVERLAP', 60),
+)
+
+
+def issue(user, device_info):
+    """Bumps the user's generation (single device rule) and signs a new access token."""
+    generation = generations.bump(user.id)
+    payload = {
+        'u': user.id,
+        'r': user.role,
+        's': int(user.is_staff),
+        'd': device_hash(device_info),
+        'g': generation,
+    }
+    return signing.dumps(payload, salt=TOKEN_SALT, compress=False)
+
+
+def revoke(user_id):
+    generations.bump(user_id)
+
+
+def verify(token):
+    """Returns TokenClaims, or None if the signature, age or generation does not match."""
+    try:
+        payload = signing.loads(
+            token, salt=TOKEN_SALT, max_age=getattr(settings, 'SIGNED_TOKEN_MAX_AGE', None)
+        )
+        # Imzo ichidagi vaqt (issued-at)
+        issued_at = signing.b62_decode(token.rsplit(':', 2)[1])
+        claims = TokenClaims(
+            user_id=payload['u'], role=payload['r'], is_staff=bool(payload['s']),
+            device=payload['d'], generation=payload['g'], issued_at=issued_at,
+        )
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+    if not generations.accepts(claims.user_id, claims.generation):
+        return None
+    return claims
@@ -0,0 +1,113 @@
+# api/services/stats.py
+"""
+Materialized per-user EXAM statistics (UserExamStats).
+Rows are recomputed with one grouped aggregate whenever a user's exams finish
+or are cleared, so the statistics endpoints read a single row.
+"""
+from django.db.models import Count, Max, Q, Sum
+
+from api import enums
+from api.models import Result, UserExamStats
+
+# Shuncha to'g'ri javob - exam topshirildi
+PASS_SCORE = 18
+
+STAT_FIELDS = [
+    'exam_count', 'true_answers', 'incorrect_answers', 'questions', 'best_score', 'pass_count',
+    'average_score', 'average_percent',
+]
+
+
+def finished_exams():
+    return Result.objects.filter(test_type=enums.TestChoices.EXAM, finished=True)
+
+
+def aggregate_rows(results):
+    """user_id bo'yicha guruhlangan Sum/Count/Max (bitta so'rov)."""
+    return results.order_by().values('user_id').annotate(
+        exam_count=Count('id'),
+        true_sum=Sum('true_answers'),
+        incorrect_sum=Sum('incorrect_answers'),
+        questions=Sum('test_length'),
+        best_score=Max('true_answers'),
+        pass_count=Count('id', filter=Q(true_answers__gte=PASS_SCORE)),
+    )
+
+
+def averages(true_answers, incorrect_answers, exam_count):
+    """(average_score, average_percent); percent is of answered questions."""
+    answered = true_answers + incorrect_answers
+    return (
+        true_answers / exam_count if exam_count else 0,
+        true_answers * 100 / answered if answered else 0,
+    )
+
+
+def _upsert(results):
+    rows = []
+    for row in aggregate_rows(results):
+        average_score, average_percent = averages(row['true_sum'], row['incorrect_sum'], row['exam_count'])
+        rows.append(UserExamStats(
+            user_id=row['user_id'],
+            exam_count=row['exam_count'],
+            true_answers=row['true_sum'],
+            incorrect_answers=row['incorrect_sum'],
+            questions=row['questions'],
+            best_score=row['best_score'],
+            pass_count=row['pass_count'],
+            average_score=average_score,
+            average_percent=average_percent,
+        ))
+    if rows:
+        UserExamStats.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user'], update_fields=STAT_FIELDS + ['updated_at'],
+        )
+    return rows
+
+
+def refresh_users(user_ids):
+    """Recomputes (or removes) the stats rows of the given users. Returns rows written."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0
+    rows = _upsert(finished_exams().filter(user_id__in=user_ids))
+    # Natijalari tozalangan userlar
+    cleared = user_ids - {row.user_id for row in rows}
+    if cleared:
+        UserExamStats.objects.filter(user_id__in=cleared).delete()
+    return len(rows)
+
+
+def results_finished(result_ids):
+    """Hook for results.finish(): refreshes the owners of newly finished exams (no-op for other types)."""
+    owners = Result.objects.filter(id__in=result_ids, test_type=enums.TestChoices.EXAM).values('user_id')
+    return len(_upsert(finished_exams().filter(user_id__in=owners)))
+
+
+def rebuild(batch_size=1000):
+    """Recomputes every stats row from Result; yields the number of rows written per batch."""
+    UserExamStats.objects.exclude(user_id__in=finished_exams().values('user_id')).delete()
+    user_ids = list(finished_exams().order_by('user_id').values_list('user_id', flat=True).distinct())
+    for i in range(0, len(user_ids), batch_size):
+        yield refresh_users(user_ids[i:i + batch_size])
+
+
+def payload(stats):
+    """Response of the user / admin statistics endpoints (stats may be None)."""
+    total_tests = stats.exam_count if stats else 0
+    total_correct = stats.true_answers if stats else 0
+    total_incorrect = stats.incorrect_answers if stats else 0
+    total_questions = total_correct + total_incorrect
+    return {
+        "total_tests": total_tests,
+        "total_correct": total_correct,
+        "total_incorrect": total_incorrect,
+        "total_questions": total_questions,
+        "average_score": round(total_correct / total_tests) if total_tests > 0 else 0,
+        "average_percent": round((total_correct / total_questions) * 100, 1) if total_questions > 0 else 0,
+        "best_score": stats.best_score if stats else 0,
+    }
+
+
+def for_user(user_id):
+    return payload(UserExamStats.objects.filter(user_id=user_id).first())
@@ -0,0 +1,80 @@
+# api/services/test_index.py
+import random
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from django.conf import settings
+
+from api.services import versions
+
+VERSION_NAME = 'tests'
+
+IndexSnapshot = namedtuple('IndexSnapshot', ['version', 'built_at', 'ids', 'by_theme', 'by_ticket'])
+
+EMPTY = array('q')
+
+
+class ActiveTestIndex:
+    """
+    Compact index of active Test ids (array('q')), partitioned by theme and ticket.
+    Built lazily with one values_list() query, rebuilt after invalidate()
+    or once it is older than `max_age` seconds.
+    """
+
+    def __init__(self, max_age=60):
+        self.max_age = max_age
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        version = versions.get_version(VERSION_NAME)
+        snapshot = self._snapshot
+        if self._is_stale(snapshot, version):
+            with self._lock:
+                snapshot = self._snapshot
+                if self._is_stale(snapshot, version):
+                    snapshot = self._snapshot = self._build(version)
+        return snapshot
+
+    def _is_stale(self, snapshot, version):
+        return (
+            snapshot is None
+            or snapshot.version != version
+            or time.monotonic() - snapshot.built_at > self.max_age
+        )
+
+    def _build(self, version):
+        from api.models import Test
+
+        ids, by_theme, by_ticket = array('q'), {}, {}
+        rows = Test.objects.filter(active=True).order_by('id').values_list('id', 'theme_id', 'ticket_id')
+        for test_id, theme_id, ticket_id in rows.iterator(chunk_size=5000):
+            ids.append(test_id)
+            by_theme.setdefault(theme_id, array('q')).append(test_id)
+            by_ticket.setdefault(ticket_id, array('q')).append(test_id)
+        return IndexSnapshot(version, time.monotonic(), ids, by_theme, by_ticket)
+
+    def all_ids(self):
+        return self.snapshot().ids
+
+    def theme_ids(self, theme_id):
+        return self.snapshot().by_theme.get(theme_id, EMPTY)
+
+    def ticket_ids(self, ticket_id):
+        return self.snapshot().by_ticket.get(ticket_id, EMPTY)
+
+    def sample(self, count, ids=None):
+        """Tasodifiy `count` ta test id (faqat id lar, modellar yuklanmaydi)."""
+        if ids is None:
+            ids = self.all_ids()
+        return random.sample(ids, count)
+
+    def invalidate(self):
+        """Call after admin writes that add, change, activate or remove tests."""
+        self._snapshot = None
+        versions.bump_version(VERSION_NAME)
+
+
+active_tests = ActiveTestIndex(max_age=getattr(settings, 'ACTIVE_TEST_INDEX_MAX_AGE', 60))
@@ -0,0 +1,44 @@
+# api/services/versions.py
+"""
+Version tokens for in-process caches, kept in Django's cache framework.
+CACHES is shared by all workers (Redis or the database cache table), so a bump
+in one worker is seen by the others within VERSION_CHECK_INTERVAL seconds
+(the bumping worker sees it at once).
+
+A bump stores a new unique token instead of incrementing: two concurrent bumps
+still both change the version, and an evicted key never comes back as an old value.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+KEY_PREFIX = 'api:version:'
+
+_checked = {}  # name -> (version, monotonic time it was read)
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def get_version(name):
+    checked = _checked.get(name)
+    if checked is not None and time.monotonic() - checked[1] < getattr(settings, 'VERSION_CHECK_INTERVAL', 1):
+        return checked[0]
+    key = KEY_PREFIX + name
+    version = cache.get(key)
+    if version is None:
+        candidate = _new_version()
+        cache.add(key, candidate, timeout=None)
+        version = cache.get(key) or candidate
+    _checked[name] = (version, time.monotonic())
+    return version
+
+
+def bump_version(name):
+    version = _new_version()
+    cache.set(KEY_PREFIX + name, version, timeout=None)
+    _checked[name] = (version, time.monotonic())
+    return version
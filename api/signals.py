@@ -0,0 +1,44 @@
+# api/signals.py
+"""
+Dashboard counters (api/services/dashboard.py) follow creates and deletes.
+Result has no receivers: running_exams is counted live, and delete receivers
+would turn the reaper's fast QuerySet.delete() into a per-row delete.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import Test, Theme, Ticket, User
+from api.services import dashboard
+
+COUNTED = {User: 'users', Theme: 'themes', Ticket: 'tickets', Test: 'tests'}
+
+
+def _created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        dashboard.adjust_on_commit(COUNTED[sender], 1)
+
+
+def _deleted(sender, instance, **kwargs):
+    dashboard.adjust_on_commit(COUNTED[sender], -1)
+
+
+for model in COUNTED:
+    post_save.connect(_created, sender=model, dispatch_uid=f'dashboard-created-{model.__name__}')
+    post_delete.connect(_deleted, sender=model, dispatch_uid=f'dashboard-deleted-{model.__name__}')
+
+
+@receiver(post_save, sender=Test, dispatch_uid='dashboard-test-active')
+def test_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        dashboard.adjust_on_commit('active_tests', 1 if instance.active else 0)
+    else:
+        # Eski active qiymati noma'lum: bitta COUNT (admin yozuvlari kam)
+        dashboard.reconcile_on_commit(['active_tests'])
+
+
+@receiver(post_delete, sender=Test, dispatch_uid='dashboard-test-active-deleted')
+def test_deleted(sender, instance, **kwargs):
+    if instance.active:
+        dashboard.adjust_on_commit('active_tests', -1)
@@ -0,0 +1,31 @@
+"""Shared setup for the api tests."""
+from django.test import TestCase
+
+from api.services.activity import session_activity
+from api.services.question_cache import question_cache
+from api.services.question_stats import recorder
+from api.services.rollups import exam_activity
+from api.services.session_cache import session_cache
+from api.services.test_index import active_tests
+
+DEVICE = 'test-agent'
+
+
+def flush_buffers():
+    # Write-behind buferlar test ichida yoziladi (atexit da test bazasi bo'lmaydi)
+    session_activity.flush()
+    recorder.flush()
+    exam_activity.flush()
+
+
+class ServiceTestCase(TestCase):
+    """Starts every test with empty in-process caches and flushes write-behind buffers after it."""
+
+    def setUp(self):
+        super().setUp()
+        flush_buffers()
+        session_cache.clear()
+        question_cache.clear()
+        active_tests.invalidate()
+        self.addCleanup(flush_buffers)
+        self.addCleanup(session_cache.clear)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from api import enums
+from api.management.bench import make_question_bank, make_user
+from api.models import Result, Test, TestSheet
+from api.services import sheets
+from api.tests.base import DEVICE, ServiceTestCase
+
+# Aniq so'rovlar soni (bench_answer budjeti: 6 / 8). TestCase tranzaksiyasi ichida
+# atomic(savepoint=False) BEGIN/COMMIT bermaydi: muddati o'tgan exam 8 emas 6
+QUERY_BUDGET = 5
+# Noto'g'ri javob: shartli yakunlash UPDATE (incorrect_answers >= 3) ham yuriladi
+INCORRECT_QUERY_BUDGET = 6
+# Testni tugatuvchi javob: yakunlash + userning exam statistikasini yangilash
+FINISH_QUERY_BUDGET = 6
+
+
+class AnswerQueryBudgetTests(ServiceTestCase):
+    """SolveTestViewSet.answer stays within its query budget."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_question_bank(30, themes=3, tickets=3)
+        cls.user, cls.token = make_user('student', device=DEVICE)
+        cls.test_ids = list(Test.objects.order_by('id').values_list('id', flat=True))
+        cls.correct = dict(Test.objects.values_list('id', 'correct_answer_id'))
+
+    def setUp(self):
+        super().setUp()
+        self.client.defaults.update(HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+        # Auth keshini isitish: o'lchovga sessiya so'rovi kirmasin
+        self.answer(self.new_sheets()[0])
+
+    def new_sheets(self, test_type=enums.TestChoices.THEME, count=None):
+        self.result = sheets.create_result(self.user, 'test', test_type, self.test_ids[:count])
+        return list(TestSheet.objects.filter(result=self.result).order_by('id').values_list('id', 'test_id', 'variant_orders'))
+
+    def answer(self, sheet, right=True):
+        sheet_id, test_id, orders = sheet
+        variant_id = self.correct[test_id] if right else next(v for v in orders if v != self.correct[test_id])
+        return self.client.post(f'/api/solve_tests/{sheet_id}/answer/', {'variant_id': variant_id})
+
+    def assertAnswer(self, budget, sheet, right=True):
+        with self.assertNumQueries(budget):
+            response = self.answer(sheet, right)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_correct_answer(self):
+        self.assertAnswer(QUERY_BUDGET, self.new_sheets()[0])
+
+    def test_incorrect_answer(self):
+        self.assertAnswer(INCORRECT_QUERY_BUDGET, self.new_sheets()[0], right=False)
+
+    def test_third_incorrect_answer_finishes(self):
+        rows = self.new_sheets()
+        self.answer(rows[0], right=False)
+        self.answer(rows[1], right=False)
+        self.assertAnswer(FINISH_QUERY_BUDGET, rows[2], right=False)
+        self.result.refresh_from_db()
+        self.assertTrue(self.result.finished)
+
+    def test_expired_exam_answer_finishes(self):
+        rows = self.new_sheets(enums.TestChoices.EXAM, 20)
+        Result.objects.filter(id=self.result.id).update(start_time=self.result.start_time - timedelta(minutes=30))
+        self.assertAnswer(FINISH_QUERY_BUDGET, rows[0])
+        self.result.refresh_from_db()
+        self.assertTrue(self.result.finished)
+
+    def test_answer_without_correct_variant(self):
+        rows = self.new_sheets()
+        Test.objects.filter(id=rows[0][1]).update(correct_answer=None)
+        sheet_id, _, orders = rows[0]
+        response = self.client.post(f'/api/solve_tests/{sheet_id}/answer/', {'variant_id': orders[0]})
+        self.assertEqual(response.status_code, 200, response.content)
@@ -0,0 +1,40 @@
+from api import enums
+from api.management.bench import make_question_bank, make_user
+from api.models import Test, TestSheet, Variant
+from api.services import sheets
+from api.tests.base import DEVICE, ServiceTestCase
+
+
+class AnswerVariantTests(ServiceTestCase):
+    """Answers are checked against the sheet's test, not only the variants it was created with."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_question_bank(3, themes=1, tickets=1)
+        cls.user, cls.token = make_user('student', device=DEVICE)
+        test_ids = list(Test.objects.order_by('id').values_list('id', flat=True))
+        result = sheets.create_result(cls.user, 'test', enums.TestChoices.THEME, test_ids)
+        cls.sheets = list(TestSheet.objects.filter(result=result).order_by('id'))
+
+    def setUp(self):
+        super().setUp()
+        self.client.defaults.update(HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+
+    def answer(self, sheet, variant_id):
+        return self.client.post(f'/api/solve_tests/{sheet.id}/answer/', {'variant_id': variant_id})
+
+    def test_variant_added_after_start_can_be_the_correct_answer(self):
+        sheet = self.sheets[0]
+        added = Variant.objects.create(test_id=sheet.test_id, value='Yangi variant')
+        Test.objects.filter(id=sheet.test_id).update(correct_answer=added)
+        self.assertNotIn(added.id, sheet.variant_orders)
+
+        response = self.answer(sheet, added.id)
+        self.assertEqual(response.status_code, 200, response.content)
+        sheet.refresh_from_db()
+        self.assertEqual(sheet.current_answer_id, added.id)
+        self.assertTrue(sheet.successful)
+
+    def test_variant_of_another_test_is_rejected(self):
+        other = Variant.objects.filter(test_id=self.sheets[1].test_id).first()
+        self.assertEqual(self.answer(self.sheets[0], other.id).status_code, 404)
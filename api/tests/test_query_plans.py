@@ -0,0 +1,121 @@
+import re
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.timezone import now
+
+from api import enums
+from api.management.bench import make_question_bank, make_user
+from api.models import Test, TestSheet, UserSession
+from api.services import (
+    answers, deadlines, feed, leaderboard, question_stats, reaper, results, rollups, sheets, stats,
+)
+from api.tests.base import ServiceTestCase
+
+# "SCAN api_result" - butun jadval o'qiladi; "SCAN ... USING (COVERING) INDEX" - indeks bo'yicha
+TABLE_SCAN = re.compile(r'^SCAN (\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class Rollback(Exception):
+    pass
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN faqat SQLite uchun")
+class QueryPlanTests(ServiceTestCase):
+    """Every hot query is answered from an index: no whole table reads, no sorts without an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        theme_ids, ticket_ids = make_question_bank(200)
+        cls.theme_id, cls.ticket_id = theme_ids[0], ticket_ids[0]
+        cls.test_ids = list(Test.objects.order_by('id').values_list('id', flat=True)[:20])
+        cls.users = [make_user(f'plan_user{i}')[0] for i in range(3)]
+        for user in cls.users:
+            for _ in range(3):
+                result = sheets.create_result(user, 'plan', enums.TestChoices.EXAM, cls.test_ids)
+                TestSheet.objects.filter(result=result).update(selected=True, successful=True)
+                results.finish([result.id])
+        cls.open_result = sheets.create_result(cls.users[0], 'plan', enums.TestChoices.EXAM, cls.test_ids)
+
+    def hot_queries(self):
+        user, other = self.users[0], self.users[1]
+        open_result = self.open_result
+        sheet = TestSheet.objects.filter(result=open_result).select_related('test').first()
+        token = UserSession.objects.get(user=user).token
+        _, cursor = feed.page(feed.results(), 2)
+        theme_id, ticket_id = self.theme_id, self.ticket_id
+
+        return [
+            ('auth: session by token',
+             lambda: UserSession.objects.filter(token=token).select_related('user').first()),
+            ('start: supersede open attempts and create sheets',
+             lambda: sheets.create_result(other, 'plan', enums.TestChoices.EXAM, self.test_ids)),
+            ('answer', lambda: answers.submit_answer(user, sheet.id, sheet.test.correct_answer_id)),
+            ('finish', lambda: results.finish([open_result.id])),
+            ('active tests of a theme',
+             lambda: list(Test.objects.filter(active=True, theme_id=theme_id).values_list('id', flat=True))),
+            ('active tests of a ticket',
+             lambda: list(Test.objects.filter(active=True, ticket_id=ticket_id).values_list('id', flat=True))),
+            ('feed: all users', lambda: feed.page(feed.results(), 50, cursor)),
+            ('feed: one user', lambda: feed.page(feed.results(user.id), 20)),
+            ('stats: one user', lambda: stats.for_user(user.id)),
+            *[(f'leaderboard: {sort}', lambda sort=sort: leaderboard.page(sort, 50)) for sort in leaderboard.SORTS],
+            ('question stats: write counters', lambda: self.flush_question_stats(sheet)),
+            ('question stats: hardest', lambda: question_stats.items(question_stats.hardest(50)[0])),
+            ('question stats: hardest in a theme',
+             lambda: question_stats.hardest(50, theme_id=theme_id)),
+            ('question stats: hardest in a ticket',
+             lambda: question_stats.hardest(50, ticket_id=ticket_id)),
+            ('exam activity: hourly series',
+             lambda: rollups.series(enums.PeriodChoices.HOUR, timezone.localdate(), timezone.localdate())),
+            ('deadlines: expired exams',
+             lambda: list(deadlines.expired_exams().order_by('start_time').values_list('id', flat=True)[:500])),
+            ('deadlines: next deadline', deadlines.next_deadline),
+            ('reaper: abandoned results',
+             lambda: list(reaper.reapable_results().order_by('id').values_list('id', flat=True)[:500])),
+            ('housekeeping: stale sessions',
+             lambda: list(UserSession.objects.filter(updated_at__lt=now() - timedelta(days=30))
+                          .values_list('id', flat=True))),
+        ]
+
+    def flush_question_stats(self, sheet):
+        question_stats.recorder.record(sheet.test_id, sheet.test.correct_answer_id, True)
+        question_stats.recorder.flush()
+
+    def explain(self, func):
+        """Runs func in a rolled back savepoint; returns the full scans / temp sorts of its statements."""
+        with CaptureQueriesContext(connection) as captured:
+            try:
+                with transaction.atomic():
+                    func()
+                    raise Rollback
+            except Rollback:
+                pass
+
+        problems, statements = [], 0
+        with connection.cursor() as cursor:
+            for query in captured.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                statements += 1
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                for detail in (row[3] for row in cursor.fetchall()):
+                    if TABLE_SCAN.match(detail) or detail == TEMP_SORT:
+                        problems.append(f"{detail}  <-  {sql[:160]}")
+        return problems, statements
+
+    def test_hot_queries_use_indexes(self):
+        for name, func in self.hot_queries():
+            with self.subTest(name):
+                problems, statements = self.explain(func)
+                self.assertGreater(statements, 0, "so'rov yuborilmadi")
+                self.assertEqual(problems, [])
+
+    def test_detects_full_scan(self):
+        problems, _ = self.explain(lambda: list(Test.objects.filter(value='x')))
+        self.assertTrue(any(TABLE_SCAN.match(problem.split('  <-  ')[0]) for problem in problems))
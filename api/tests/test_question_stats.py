@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.utils.timezone import now
+
+from api import enums
+from api.management.bench import make_question_bank, make_user
+from api.models import QuestionStats, Test, TestSheet, VariantStats
+from api.services import question_stats, sheets
+from api.services.question_stats import QuestionStatsRecorder
+from api.tests.base import ServiceTestCase
+
+
+class RebuildTests(ServiceTestCase):
+    """rebuild() is authoritative: answers buffered in other workers are not counted twice."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_question_bank(3, themes=1, tickets=1)
+        user = make_user('student')[0]
+        result = sheets.create_result(
+            user, 'test', enums.TestChoices.THEME, list(Test.objects.values_list('id', flat=True)),
+        )
+        cls.sheet = TestSheet.objects.filter(result=result).select_related('test').order_by('id').first()
+        cls.test_id, cls.variant_id = cls.sheet.test_id, cls.sheet.test.correct_answer_id
+
+    def setUp(self):
+        super().setUp()
+        # Boshqa worker: rebuild() uning buferini bo'shata olmaydi
+        self.worker = QuestionStatsRecorder(interval=3600, threshold=1000)
+
+    def answer(self, at):
+        TestSheet.objects.filter(id=self.sheet.id).update(current_answer_id=self.variant_id, selected=True, successful=True)
+        self.worker.record(self.test_id, self.variant_id, True, at=at)
+
+    def stats(self):
+        row = QuestionStats.objects.get(test_id=self.test_id)
+        return row.answered, row.correct, VariantStats.objects.get(variant_id=self.variant_id).chosen
+
+    def test_buffered_answer_counted_by_rebuild_is_not_added_again(self):
+        self.answer(now() - timedelta(seconds=1))
+        list(question_stats.rebuild())
+        self.assertEqual(self.stats(), (1, 1, 1))
+        self.worker.flush()
+        self.assertEqual(self.stats(), (1, 1, 1))
+
+    def test_answer_after_rebuild_is_added(self):
+        list(question_stats.rebuild())
+        self.worker.record(self.test_id, self.variant_id, True, at=now() + timedelta(seconds=1))
+        self.worker.flush()
+        self.assertEqual(self.stats()[:2], (1, 1))
+
+    def test_unanswered_question_is_not_listed(self):
+        list(question_stats.rebuild())
+        self.assertTrue(QuestionStats.objects.filter(answered=0).exists())
+        rows, _ = question_stats.hardest(50, min_answers=0)
+        self.assertNotIn(0, [row.answered for row in rows])
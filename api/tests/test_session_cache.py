@@ -0,0 +1,193 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.management.bench import make_user
+from api.models import UserSession
+from api.services import jobs
+from api.services.activity import session_activity
+from api.services.session_cache import SessionCache, session_cache
+from api.tests.base import DEVICE, ServiceTestCase
+
+
+def session_queries(ctx):
+    return [q['sql'] for q in ctx.captured_queries if 'api_usersession' in q['sql']]
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class SessionCacheTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.token = make_user('student', device=DEVICE)
+        self.client.defaults.update(HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+
+    def test_miss_loads_session_and_user_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/profile/')
+        self.assertEqual(response.status_code, 200)
+        reads = session_queries(ctx)
+        self.assertEqual(len(reads), 1)
+        self.assertIn('api_user', reads[0].split('FROM', 1)[1])
+        self.assertEqual(len(session_cache), 1)
+
+    def test_hit_reads_no_session_row(self):
+        self.client.get('/api/profile/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(session_queries(ctx), [])
+
+    def test_disabled_cache_reads_every_time(self):
+        with mock.patch.object(session_cache, 'enabled', False):
+            self.client.get('/api/profile/')
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get('/api/profile/')
+        self.assertEqual(len(session_queries(ctx)), 1)
+        self.assertEqual(len(session_cache), 0)
+
+    def test_logout_drops_cached_session(self):
+        self.client.get('/api/profile/')
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(len(session_cache), 0)
+        # Sessiya qurilmasi o'chirildi: keshdagi eski nusxa ishlatilmasligi kerak
+        self.assertEqual(self.client.get('/api/profile/').status_code, 403)
+
+    def test_profile_update_drops_cached_session(self):
+        self.client.get('/api/profile/')
+        response = self.client.put(
+            '/api/profile/', {'username': 'student', 'full_name': 'New Name'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(session_cache), 0)
+        self.assertEqual(self.client.get('/api/profile/').json()['full_name'], 'New Name')
+
+    def test_unknown_token_is_not_cached(self):
+        response = self.client.get('/api/profile/', HTTP_AUTHORIZATION='00000000-0000-0000-0000-000000000000')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(session_cache), 0)
+
+
+class SessionCacheBoundsTests(TestCase):
+    def setUp(self):
+        self.session = UserSession.objects.select_related('user').get(
+            user=make_user('bounded', password='x', device=DEVICE)[0],
+        )
+
+    def test_expired_entry_is_a_miss(self):
+        cache = SessionCache(ttl=-1)
+        cache.set('token', self.session)
+        self.assertIsNone(cache.get('token'))
+        self.assertEqual(len(cache), 0)
+
+    def test_size_bound_evicts_least_recently_used(self):
+        cache = SessionCache(max_size=2)
+        cache.set('a', self.session)
+        cache.set('b', self.session)
+        cache.get('a')
+        cache.set('c', self.session)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_invalidate_user_drops_every_token(self):
+        cache = SessionCache()
+        cache.set('a', self.session)
+        cache.set('b', self.session)
+        cache.invalidate_user(self.session.user_id)
+        self.assertEqual(len(cache), 0)
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_invalidation_in_another_worker_is_a_miss(self):
+        cache = SessionCache()
+        cache.set('a', self.session)
+        self.assertIsNotNone(cache.get('a'))
+        # Boshqa worker: o'z kesh nusxasi, umumiy versiya
+        SessionCache().invalidate_user(self.session.user_id)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    @override_settings(VERSION_CHECK_INTERVAL=0)
+    def test_version_read_before_load_wins(self):
+        cache = SessionCache()
+        version = cache.version()
+        SessionCache().invalidate_user(self.session.user_id)
+        cache.set('a', self.session, version)
+        self.assertIsNone(cache.get('a'))
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class SessionActivityTests(ServiceTestCase):
+    requests = 20
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.token = make_user('admin', role='ADMIN', device=DEVICE)
+        self.client.defaults.update(HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+
+    def test_admin_last_seen_writes_are_coalesced(self):
+        before = UserSession.objects.get(user=self.user).updated_at
+        with mock.patch.object(session_activity, 'interval', 3600), \
+                mock.patch.object(session_activity, '_last_flush', time.monotonic()):
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(self.requests):
+                    self.assertEqual(self.client.get('/api/admin/test/').status_code, 200)
+        self.assertFalse([sql for sql in session_queries(ctx) if sql.startswith('UPDATE')])
+        self.assertEqual(len(session_activity), 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(session_activity.flush(), 1)
+        self.assertEqual(len([sql for sql in session_queries(ctx) if sql.startswith('UPDATE')]), 1)
+        self.assertGreater(UserSession.objects.get(user=self.user).updated_at, before)
+
+    def test_idle_worker_is_flushed_by_periodic_job(self):
+        with mock.patch.object(jobs, '_jobs', []), \
+                mock.patch.object(jobs, 'is_management_command', return_value=False), \
+                mock.patch.object(jobs.PeriodicJob, 'start'):
+            jobs.start_background_jobs()
+            job = next(job for job in jobs._jobs if job.name == 'session-activity-flush')
+        self.assertEqual(job.interval, session_activity.interval)
+
+        with mock.patch.object(session_activity, 'interval', 3600), \
+                mock.patch.object(session_activity, '_last_flush', time.monotonic()):
+            self.client.get('/api/admin/test/')
+        self.assertEqual(len(session_activity), 1)
+        job.func()
+        self.assertEqual(len(session_activity), 0)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class LoginTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.token = make_user('login', password='secret', device=DEVICE)
+
+    def login(self, password='secret', device=DEVICE):
+        return self.client.post(
+            '/api/auth/login/', {'username': 'login', 'password': password}, HTTP_USER_AGENT=device,
+        )
+
+    def test_password_is_checked_once(self):
+        from api.hashers import PBKDF2PasswordHasher
+
+        with mock.patch.object(PBKDF2PasswordHasher, 'verify', autospec=True,
+                               side_effect=PBKDF2PasswordHasher.verify) as verify:
+            response = self.login()
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_same_device_reuses_session_and_drops_cache(self):
+        self.client.get('/api/profile/', HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+        self.assertEqual(len(session_cache), 1)
+        response = self.login()
+        self.assertEqual(response.json()['token'], self.token)
+        self.assertEqual(UserSession.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(len(session_cache), 0)
+
+    def test_other_device_is_rejected(self):
+        self.assertEqual(self.login(device='other-agent').status_code, 403)
+
+    def test_wrong_password(self):
+        self.assertEqual(self.login(password='wrong').status_code, 400)
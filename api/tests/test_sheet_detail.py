@@ -0,0 +1,55 @@
+from django.test import Client
+
+from api import enums
+from api.management.bench import make_question_bank, make_user
+from api.models import Test, TestSheet, Variant
+from api.services import sheets
+from api.tests.base import DEVICE, ServiceTestCase
+
+
+class SheetDetailETagTests(ServiceTestCase):
+    """The result detail ETag changes when an admin edits a question of the result."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_question_bank(5, themes=1, tickets=1)
+        cls.user, cls.token = make_user('student', device=DEVICE)
+        _, cls.admin_token = make_user('admin', role=enums.RoleChoices.ADMIN, device=DEVICE)
+        test_ids = list(Test.objects.order_by('id').values_list('id', flat=True))
+        cls.result = sheets.create_result(cls.user, 'test', enums.TestChoices.THEME, test_ids)
+        cls.test_id = TestSheet.objects.filter(result=cls.result).order_by('id').values_list('test_id', flat=True)[0]
+
+    def setUp(self):
+        super().setUp()
+        self.client.defaults.update(HTTP_AUTHORIZATION=self.token, HTTP_USER_AGENT=DEVICE)
+        self.admin = Client(HTTP_AUTHORIZATION=self.admin_token, HTTP_USER_AGENT=DEVICE)
+        self.url = f'/api/result/{self.result.id}/tests/'
+
+    def cached_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def test_variant_edit_changes_etag(self):
+        etag = self.cached_etag()
+        variant = Variant.objects.filter(test_id=self.test_id).first()
+        response = self.admin.put(
+            f'/api/admin/test/variant/{variant.id}/', {'value': 'Yangi variant'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Yangi variant', response.content.decode())
+
+    def test_image_removal_changes_etag(self):
+        etag = self.cached_etag()
+        response = self.admin.patch(f'/api/admin/test/{self.test_id}/')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from api.management.bench import make_user
+from api.services import signed_tokens
+from api.services.signed_tokens import GenerationRegistry
+from api.tests.base import DEVICE, ServiceTestCase
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class GenerationRegistryTests(ServiceTestCase):
+    """Tokens issued by one worker are accepted by the others before their next refresh."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('signed', device=DEVICE)[0]
+        # Ikki worker: har birining o'z nusxasi
+        self.issuer = GenerationRegistry(refresh_interval=60)
+        self.other = GenerationRegistry(refresh_interval=60)
+        self.issuer.bump(self.user.id)
+        self.other.sync()
+
+    def test_newer_token_from_another_worker_is_accepted(self):
+        with mock.patch.object(signed_tokens, 'generations', self.issuer):
+            token = signed_tokens.issue(self.user, DEVICE)
+        with mock.patch.object(signed_tokens, 'generations', self.other):
+            claims = signed_tokens.verify(token)
+        self.assertIsNotNone(claims)
+        self.assertEqual(self.other.current(self.user.id), claims.generation)
+
+    def test_older_token_is_rejected(self):
+        with mock.patch.object(signed_tokens, 'generations', self.issuer):
+            old = signed_tokens.issue(self.user, DEVICE)
+            new = signed_tokens.issue(self.user, DEVICE)
+        with mock.patch.object(signed_tokens, 'generations', self.other):
+            self.assertIsNotNone(signed_tokens.verify(new))
+            self.assertIsNone(signed_tokens.verify(old))
+
+    def test_revoked_token_is_rejected_after_sync(self):
+        with mock.patch.object(signed_tokens, 'generations', self.issuer):
+            token = signed_tokens.issue(self.user, DEVICE)
+            signed_tokens.revoke(self.user.id)
+        self.other.sync()
+        with mock.patch.object(signed_tokens, 'generations', self.other):
+            self.assertIsNone(signed_tokens.verify(token))
@@ -61,6 +61,8 @@ from api.views.admin_apis import (
 
     # Statistics
     StatisticsView,
+    QuestionStatisticsView,
+    ExamActivityView,
     UserStatisticsView,
     AdminUserStatisticsView
 )
@@ -90,6 +92,8 @@ urlpatterns += [
     # True Variant select url
     path("admin/test/variant/<int:pk>/true/", VariantIsTrueView.as_view(), name="Test-variant-true-select"),
     path("admin/statistics/", StatisticsView.as_view(), name="Statistics"),
+    path("admin/question_statistics/", QuestionStatisticsView.as_view(), name="Question statistics"),
+    path("admin/exam_activity/", ExamActivityView.as_view(), name="Exam activity"),
 
     # All User Results
     path("admin/all_users_stats/", UserStatisticsView.as_view(), name="All user stats"),
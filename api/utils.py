@@ -1,7 +1,26 @@
+import hashlib
 import uuid
 
+from django.conf import settings
 
 
 def generate_token(ip_str):
     return uuid.uuid1()
 
+
+def signed_tokens_enabled():
+    return getattr(settings, 'AUTH_TOKEN_MODE', 'session') == 'signed'
+
+
+def session_token(session):
+    """Client token for a UserSession: the uuid itself, or a signed token in 'signed' mode."""
+    if signed_tokens_enabled():
+        from api.services import signed_tokens
+        return signed_tokens.issue(session.user, session.device_info)
+    return str(session.token)
+
+
+def make_etag(*parts):
+    """Strong ETag (quoted) from the values that define a response's content."""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
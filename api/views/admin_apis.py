@@ -34,9 +34,18 @@ from api.serializers import (
     # Data
     ClearUserResultsSerializer
 )
-from api.utils import generate_token
+from api.utils import generate_token, signed_tokens_enabled
+from api.services import dashboard, leaderboard, question_stats, rollups, signed_tokens, stats
 from rest_framework.views import APIView
 from api.decorators import user_required, admin_required
+from api.flat_serializers import flat
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from api.services.session_cache import session_cache
+from api.services.bank import question_bank_changed
+from api.services.catalog import catalog_changed
 
 # Import Models
 from api.models import (
@@ -126,6 +135,9 @@ class UserByIdView(AdminUser):
         serializer = UpdateUserSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            session_cache.invalidate_user(user.id)
+            if signed_tokens_enabled():
+                signed_tokens.revoke(user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -144,6 +156,9 @@ class UserByIdView(AdminUser):
         except User.DoesNotExist:
             return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         user.delete()
+        session_cache.invalidate_user(pk)
+        if signed_tokens_enabled():
+            signed_tokens.revoke(pk)
         return Response({'message': 'User deleted successfully'})
 
 # Get Users Statistika
@@ -154,41 +169,27 @@ class UserStatisticsView(AdminUser):
     )
     @admin_required
     def get(self, request):
-        users = User.objects.all()
-        datas = dict()
-        results = Result.objects.filter(test_type=enums.TestChoices.EXAM)
-        for result in results:
-            if result.user.id not in datas:
-                datas[result.user.id] = {
-                    "name": result.user.full_name,
-                    "total_tests": 0,
-                    "total_correct": 0,
-                    "total_incorrect": 0,
-                    "total_questions": 0,
-                    "true_answers": 0,
-                    "average_percent": 0,
-                    "best_score": 0,
-                }
-            datas[result.user.id]["total_tests"] += 1
-            datas[result.user.id]["total_correct"] += result.true_answers
-            datas[result.user.id]["total_incorrect"] += result.incorrect_answers
-            datas[result.user.id]["total_questions"] += result.test_length
-            datas[result.user.id]["true_answers"] += result.true_answers
-            datas[result.user.id]["best_score"] = max(datas[result.user.id]["best_score"], result.true_answers)
-        result = []
-        for user_id, user in datas.items():
-            result.append({
-                "id": user_id,
-                "name": user["name"],
-                "total_tests": datas[user_id]["total_tests"],
-                "total_correct": datas[user_id]["total_correct"],
-                "total_incorrect": datas[user_id]["total_incorrect"],
-                "average_score": round(datas[user_id]["true_answers"]/datas[user_id]["total_tests"]),
-                "average_percent": datas[user_id]["average_percent"],
-                "total_questions": datas[user_id]["total_questions"],
-                "best_score": datas[user_id]["best_score"],
-            })
-        return Response(result)
+        """
+        Leaderboard: ?sort=average|best|attempts (default average).
+        ?limit=K - top-K / sahifa, keyingi sahifa uchun ?cursor=<next_cursor>
+        """
+        params = request.query_params
+        try:
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return Response({'detail': 'limit butun son bo\'lishi kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        max_limit = getattr(settings, 'LEADERBOARD_MAX_LIMIT', 200)
+        if limit is not None and not 0 < limit <= max_limit:
+            return Response({'detail': f'limit 1..{max_limit} oralig\'ida bo\'lishi kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows, next_cursor = leaderboard.page(params.get('sort', leaderboard.DEFAULT_SORT), limit, params.get('cursor'))
+        except leaderboard.LeaderboardError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = [leaderboard.item(row) for row in rows]
+        if limit is None:
+            return Response(result)
+        return Response({"results": result, "next_cursor": next_cursor})
     # User Results Clear
     @extend_schema(
         request=ClearUserResultsSerializer,
@@ -203,6 +204,7 @@ class UserStatisticsView(AdminUser):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         Result.objects.filter(user_id=serializer.validated_data["user_id"], test_type=enums.TestChoices.EXAM).delete()
+        stats.refresh_users([serializer.validated_data["user_id"]])
         return Response({'message': 'Results deleted successfully'})
 
 
@@ -214,26 +216,7 @@ class AdminUserStatisticsView(APIView):
             user = User.objects.get(id=user_id)
         except User.DoesNotExist:
             return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-        results = Result.objects.filter(test_type=enums.TestChoices.EXAM, user=user)
-
-        total_tests = results.count()
-        total_correct = sum(r.true_answers for r in results)
-        total_incorrect = sum(r.incorrect_answers for r in results)
-        total_questions = total_correct + total_incorrect
-        avg_score = round(sum(r.true_answers for r in results) / total_tests) if total_tests > 0 else 0
-        avg_percent = round((total_correct / total_questions) * 100, 1) if total_questions > 0 else 0
-        best_score = max([r.true_answers for r in results], default=0)
-
-        data = {
-            "total_tests": total_tests,
-            "total_correct": total_correct,
-            "total_incorrect": total_incorrect,
-            "total_questions": total_questions,
-            "average_score": avg_score,
-            "average_percent": avg_percent,
-            "best_score": best_score,
-        }
-
+        data = stats.for_user(user.id)
         return Response(data)
 
 
@@ -258,6 +241,7 @@ class ThemeView(AdminMavzu):
         serializer = CreateThemeSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            catalog_changed()
             return Response({'message': 'Theme created successfully', 'data': serializer.data}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -268,8 +252,7 @@ class ThemeView(AdminMavzu):
     @admin_required
     def get(self, request):
         themes = Theme.objects.all()
-        serializer = GetThemeSerializer(themes, many=True)
-        return Response(serializer.data)
+        return Response(flat(GetThemeSerializer).many(themes))
 
 # Mavzu by id (Get, Update, Delete)
 class ThemeByIdView(AdminMavzu):
@@ -300,6 +283,7 @@ class ThemeByIdView(AdminMavzu):
         serializer = UpdateThemeSerializer(theme, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            catalog_changed()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -314,6 +298,8 @@ class ThemeByIdView(AdminMavzu):
         except Theme.DoesNotExist:
             return Response({'detail': 'Theme not found'}, status=status.HTTP_404_NOT_FOUND)
         theme.delete()
+        question_bank_changed()
+        catalog_changed()
         return Response({'message': 'Theme deleted successfully'})
 
 
@@ -336,6 +322,7 @@ class TicketView(AdminTicket):
         serializer = CreateTicketSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
+            catalog_changed()
             return Response({'message': 'Ticket created successfully', 'data': serializer.data}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -346,8 +333,7 @@ class TicketView(AdminTicket):
     @admin_required
     def get(self, request):
         tickets = Ticket.objects.all()
-        serializer = GetTicketSerializer(tickets, many=True)
-        return Response(serializer.data)
+        return Response(flat(GetTicketSerializer).many(tickets))
 
 # Ticket by id (Get, Update, Delete)
 class TicketByIdView(AdminTicket):
@@ -378,6 +364,7 @@ class TicketByIdView(AdminTicket):
         serializer = UpdateTicketSerializer(ticket, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            catalog_changed()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -392,6 +379,8 @@ class TicketByIdView(AdminTicket):
         except Ticket.DoesNotExist:
             return Response({'detail': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
         ticket.delete()
+        question_bank_changed()
+        catalog_changed()
         return Response({'message': 'Ticket deleted successfully'})
 
 # Test
@@ -416,6 +405,7 @@ class TestView(AdminTest):
         if serializer.is_valid():
             # Rasm va boshqa ma'lumotlar avtomatik saqlanadi
             new_test = serializer.save()
+            question_bank_changed()
                  
             return Response(
                 {'message': 'Test created successfully', 'data': GetTestSerializer(new_test).data}, 
@@ -433,8 +423,7 @@ class TestView(AdminTest):
     @admin_required
     def get(self, request):
         tests = Test.objects.all()
-        serializer = GetTestSerializer(tests, many=True)
-        return Response(serializer.data)
+        return Response(flat(GetTestSerializer).many(tests))
 class TestByIdView(AdminTest):
 
     @extend_schema(
@@ -464,6 +453,7 @@ class TestByIdView(AdminTest):
         serializer = UpdateTestSerializer(test, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            question_bank_changed()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -479,6 +469,7 @@ class TestByIdView(AdminTest):
         except Test.DoesNotExist:
             return Response({'detail': 'Test not found'}, status=status.HTTP_404_NOT_FOUND)
         test.delete()
+        question_bank_changed()
         return Response({'message': 'Test deleted successfully'})
     @parser_classes([parsers.MultiPartParser, parsers.FormParser])
     @extend_schema(
@@ -507,6 +498,7 @@ class TestByIdView(AdminTest):
         if 'image' not in request.FILES:
             test.image = None
             test.save()
+            question_bank_changed()
             return Response({'message': 'Test Image Removed'})
             # return Response({'detail': 'Image fayl yuborilmadi'}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -529,6 +521,7 @@ class TestByIdView(AdminTest):
         try:
             test.image = image_file
             test.save()
+            question_bank_changed()
             return Response({'message': 'Test Image Uploaded'})
         except Exception as e:
             return Response({'detail': f'Rasm saqlanmadi: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
@@ -558,6 +551,7 @@ class TestVariantView(AdminTestVariant):
         serializer = CreateVariantSerializer(data=data)
         if serializer.is_valid():
             serializer.save()
+            question_bank_changed()
             return Response({'message': 'Test variant created successfully', 'data': serializer.data}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     @extend_schema(
@@ -567,8 +561,7 @@ class TestVariantView(AdminTestVariant):
     @admin_required
     def get(self, request, test_id):
         variants = Variant.objects.filter(test_id=test_id).all()
-        serializer = GetVariantSerializer(variants, many=True)
-        return Response(serializer.data)
+        return Response(flat(GetVariantSerializer).many(variants))
 
 class TestVariantByIdView(AdminTestVariant):
     @extend_schema(
@@ -597,6 +590,7 @@ class TestVariantByIdView(AdminTestVariant):
         serializer = UpdateVariantSerializer(variant, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            question_bank_changed()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     @extend_schema(
@@ -610,6 +604,7 @@ class TestVariantByIdView(AdminTestVariant):
         except Variant.DoesNotExist:
             return Response({'detail': 'Test variant not found'}, status=status.HTTP_404_NOT_FOUND)
         variant.delete()
+        question_bank_changed()
         return Response({'message': 'Test variant deleted successfully'})
 
 
@@ -627,26 +622,70 @@ class VariantIsTrueView(AdminTestVariant):
         variant.test.correct_answer = variant
         variant.test.active = True
         variant.test.save()
+        question_bank_changed()
         return Response({'message': 'Variant is_true set successfully'})
 
 class StatisticsView(AdminTestVariant):
 
     @admin_required
     def get(self, resuest):
-        # Jami Foydalanuvchilar
-        # 0
-
-        # Jami Mavzular
-        # 0
-
-        # Jami Biletlar
-        # 0
-
-        # Jami Testlar
-        # 0
-        result = dict()
-        result['users'] = User.objects.count()
-        result['themes'] = Theme.objects.count()
-        result['tickets'] = Ticket.objects.count()
-        result['tests'] = Test.objects.count()
-        return Response(result)
+        # Jami Foydalanuvchilar, Mavzular, Biletlar, Testlar, aktiv testlar va ketayotgan examlar
+        # Hisoblagichlar DashboardCounter dan, ketayotgan examlar ochiq examlar indeksidan (2 ta so'rov)
+        return Response(dashboard.counters())
+
+
+class QuestionStatisticsView(AdminTestVariant):
+
+    @admin_required
+    def get(self, request):
+        """
+        Eng qiyin savollar (muvaffaqiyat foizi bo'yicha o'sish tartibida), har bir variant necha marta tanlangani bilan.
+        ?theme=<id> yoki ?ticket=<id>, ?min_answers=N, ?limit=N&cursor=<next_cursor>
+        """
+        params = request.query_params
+        try:
+            limit = int(params.get('limit') or 50)
+            min_answers = int(params.get('min_answers') or getattr(settings, 'QUESTION_STATS_MIN_ANSWERS', 5))
+            theme_id = int(params['theme']) if params.get('theme') else None
+            ticket_id = int(params['ticket']) if params.get('ticket') else None
+        except ValueError:
+            return Response({'detail': 'limit, min_answers, theme va ticket butun son bo\'lishi kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        max_limit = getattr(settings, 'QUESTION_STATS_MAX_LIMIT', 200)
+        if not 0 < limit <= max_limit:
+            return Response({'detail': f'limit 1..{max_limit} oralig\'ida bo\'lishi kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows, next_cursor = question_stats.hardest(
+                limit, params.get('cursor'), theme_id=theme_id, ticket_id=ticket_id, min_answers=min_answers,
+            )
+        except question_stats.QuestionStatsError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": question_stats.items(rows), "next_cursor": next_cursor})
+
+
+class ExamActivityView(AdminTestVariant):
+
+    @admin_required
+    def get(self, request):
+        """
+        Exam faolligi vaqt bo'yicha: ?period=day|hour (default day), ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD.
+        Default: day - oxirgi 30 kun, hour - bugun.
+        """
+        params = request.query_params
+        period = params.get('period', 'day').upper()
+        today = timezone.localdate()
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                try:
+                    dates[name] = parse_date(params[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    return Response({'detail': f'{name} YYYY-MM-DD formatida bo\'lishi kerak'}, status=status.HTTP_400_BAD_REQUEST)
+        date_to = dates.get('date_to', today)
+        date_from = dates.get('date_from', date_to - timedelta(days=29) if period == enums.PeriodChoices.DAY else date_to)
+        try:
+            data = rollups.series(period, date_from, date_to)
+        except rollups.RollupError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
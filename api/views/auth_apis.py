@@ -1,13 +1,15 @@
-from django.contrib.auth import authenticate, logout
+from django.contrib.auth import logout
 from rest_framework import status
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from api.serializers import LoginSerializer
-from api.utils import generate_token
+from api.utils import generate_token, session_token, signed_tokens_enabled
+from api.services import signed_tokens
 from api.models import UserSession
 from rest_framework.views import APIView
 from api.decorators import user_required
+from api.services.session_cache import session_cache
 
 # Imports for swagger
 from drf_spectacular.utils import extend_schema
@@ -28,33 +30,29 @@ class LoginView(AuthApis):
         description="Login user (only one device allowed)"
     )
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            username = serializer.validated_data['username']
-            password = serializer.validated_data['password']
-
-            user = authenticate(
-                request,
-                username=username,
-                password=password
-            )
-
-            if user is None:
-                return Response({'detail': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
+            # Parol faqat bir marta (serializer ichida) tekshiriladi
+            user = serializer.validated_data['user']
 
             # Qurilma va IP ma’lumotlarini olish
             device_info = request.headers.get('User-Agent', 'Unknown Device')
             ip_address = request.META.get('REMOTE_ADDR', None)
 
             # 🔒 Agar userda allaqachon token bo‘lsa, loginni bloklaymiz
-            existing_session = UserSession.objects.filter(user=user).first()
+            # (LoginBackend sessiyani user bilan bitta so'rovda yuklaydi)
+            try:
+                existing_session = user.user_token
+            except UserSession.DoesNotExist:
+                existing_session = None
             if existing_session:
                 # Qurilma ma’lumotlari mos emasligini tekshiramiz
                 if existing_session.device_info is None:
                     existing_session.device_info = device_info
-                    existing_session.save()
+                    existing_session.save(update_fields=['device_info', 'updated_at'])
+                    session_cache.invalidate_user(user.id)
                     return Response(
-                        {'message': 'Login successful', 'token': str(existing_session.token)},
+                        {'message': 'Login successful', 'token': session_token(existing_session)},
                         status=status.HTTP_200_OK
                     )
                 elif (existing_session.device_info != device_info):
@@ -63,16 +61,16 @@ class LoginView(AuthApis):
                         status=status.HTTP_403_FORBIDDEN
                     )
                 else:
-                    existing_session.device_info = device_info
-                    existing_session.save()
+                    existing_session.save(update_fields=['updated_at'])
+                    session_cache.invalidate_user(user.id)
                     return Response(
-                        {'message': 'You are already logged in.', 'token': str(existing_session.token)},
+                        {'message': 'You are already logged in.', 'token': session_token(existing_session)},
                         status=status.HTTP_200_OK
                     )
 
             # Token yaratish
             token = generate_token(ip_address)
-            UserSession.objects.create(
+            session = UserSession.objects.create(
                 user=user,
                 token=token,
                 device_info=device_info,
@@ -80,7 +78,7 @@ class LoginView(AuthApis):
             )
 
             return Response(
-                {'token': token, 'message': 'Login successful'},
+                {'token': session_token(session), 'message': 'Login successful'},
                 status=status.HTTP_200_OK
             )
 
@@ -96,6 +94,9 @@ class LogoutView(AuthApis):
             session = UserSession.objects.get(user=user)
             session.device_info = None
             session.save()
+            session_cache.invalidate_user(user.id)
+            if signed_tokens_enabled():
+                signed_tokens.revoke(user.id)
             return Response({'message': 'Logged out successfully'})
         except:
             return Response({'detail': 'You are not logged in.'}, status=status.HTTP_400_BAD_REQUEST)
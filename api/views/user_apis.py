@@ -24,6 +24,16 @@ from api.serializers import (
 )
 
 from api.decorators import user_required
+from api.flat_serializers import flat
+from api.services import catalog
+from api.services.session_cache import session_cache
+
+
+def _full_user(user):
+    # Signed token rejimida request.user faqat id/role/is_staff bilan keladi
+    if user.get_deferred_fields():
+        return User.objects.get(pk=user.pk)
+    return user
 
 
 # Get Profile
@@ -37,7 +47,7 @@ class Profile(UserApis):
     )
     @user_required
     def get(self, request):        
-        user = request.user
+        user = _full_user(request.user)
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
@@ -48,38 +58,47 @@ class Profile(UserApis):
     )
     @user_required
     def put(self, request):
-        user = request.user
+        user = _full_user(request.user)
         serializer = UserSerializer(user, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            session_cache.invalidate_user(user.id)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 
 
+def _catalog_response(request, cache):
+    """Pre-rendered catalog JSON; 304 while the client's copy (If-None-Match) is current."""
+    page = cache.page()
+    response = get_conditional_response(request, etag=page.etag)
+    if response is None:
+        response = HttpResponse(page.body, content_type='application/json')
+    response['ETag'] = page.etag
+    max_age = getattr(settings, 'CATALOG_MAX_AGE', 0)
+    response['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    return response
+
+
 class GetThemes(UserApis):
     @extend_schema(
         responses={200: ThemeSerializer},
-        description="Get user themes"
+        description="Get user themes (active_tests - mavzudagi aktiv testlar soni)"
     )
     @user_required
     def get(self, request):
-        all_themes = Theme.objects.all().order_by('name')
-        serializer = ThemeSerializer(all_themes, many=True)
-        return Response(serializer.data)
+        return _catalog_response(request, catalog.themes)
 
 
 class GetTickets(UserApis):
     @extend_schema(
         responses={200: TicketSerializer},
-        description="Get user tickets"
+        description="Get user tickets (active_tests - biletdagi aktiv testlar soni)"
     )
     @user_required
     def get(self, request):
-        all_tickets = Ticket.objects.all().order_by('id')
-        serializer = TicketSerializer(all_tickets, many=True)
-        return Response(serializer.data)
+        return _catalog_response(request, catalog.tickets)
 
 
 
@@ -88,10 +107,21 @@ from rest_framework import serializers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from random import sample
 from api.models import Test, Result, TestSheet, Theme, Ticket
 from django.contrib.auth import get_user_model
 from api import enums
+from api.services import answers, composition, feed, results, sheets, stats
+from api.services.exam_pool import exam_pool, ticket_templates
+from api.services.exam_state import exam_state
+from api.services import sheet_detail
+from api.services import test_index, versions
+from api.services.test_index import active_tests
+from api.utils import make_etag
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.db import IntegrityError
 
 User = get_user_model()
 
@@ -121,31 +151,16 @@ class StartTestViewSet(viewsets.ViewSet):
         theme = get_object_or_404(Theme, id=theme_id)
 
         # Barcha aktiv testlar theme bo'yicha
-        tests = Test.objects.filter(theme=theme, active=True)
-        if not tests.exists():
+        test_ids = active_tests.theme_ids(theme.id)
+        if not test_ids:
             return Response({"error": "Bu mavzuda testlar mavjud emas"}, status=400)
-        
-        # Old not finished tests clear
-        Result.objects.filter(
-            user=request.user,
-            finished=False
-        ).delete()
-        
-        # Yangi Yaratish
-        result = Result.objects.create(
-            user=request.user,
-            description=f"Theme {theme.name}",
-            test_length=tests.count(),
-            true_answers=0,
-            test_type=enums.TestChoices.THEME
-        )
 
-        # TestSheet lar generatsiya
-        for t in tests:
-            TestSheet.objects.create(result=result, test=t)
+        # Yangi Yaratish (TestSheet lar bilan birga)
+        result = sheets.create_result(
+            request.user, f"Theme {theme.name}", enums.TestChoices.THEME, test_ids
+        )
 
-        serializer = ResultSerializer(result)
-        return Response(serializer.data, status=201)
+        return Response(flat(ResultSerializer).one(result), status=201)
 
 
     @action(detail=False, methods=['post'])
@@ -157,30 +172,18 @@ class StartTestViewSet(viewsets.ViewSet):
         """
         ticket_id = request.data.get("ticket_id")
         ticket = get_object_or_404(Ticket, id=ticket_id)
-        tests = Test.objects.filter(ticket=ticket, active=True)
-        if not tests.exists():
+        # Bilet shabloni keshdan (test id lar va variantlar)
+        template = ticket_templates.get(ticket.id)
+        if not template.test_ids:
             return Response({"error": "Bu biletga testlar mavjud emas"}, status=400)
 
-        # Old not finished tests clear
-        Result.objects.filter(
-            user=request.user,
-            finished=False
-        ).delete()
-
         # Yangi Yaratish
-        result = Result.objects.create(
-            user=request.user,
-            description=f"Ticket {ticket.name}",
-            test_length=tests.count(),
-            true_answers=0,
-            test_type=enums.TestChoices.TICKET
+        result = sheets.create_result(
+            request.user, f"Ticket {ticket.name}", enums.TestChoices.TICKET,
+            template.test_ids, variants=template.variants
         )
 
-        for t in tests:
-            TestSheet.objects.create(result=result, test=t)
-
-        serializer = ResultSerializer(result)
-        return Response(serializer.data, status=201)
+        return Response(flat(ResultSerializer).one(result), status=201)
 
 
     @action(detail=False, methods=['post'])
@@ -191,32 +194,18 @@ class StartTestViewSet(viewsets.ViewSet):
         Body: { "count": int }
         """
         count = int(request.data.get("count", 20))
-        tests = Test.objects.filter(active=True)
-        if tests.count() < count:
-            return Response({"error": f"Faqat {tests.count()} ta test mavjud"}, status=400)
+        test_ids = active_tests.all_ids()
+        if len(test_ids) < count:
+            return Response({"error": f"Faqat {len(test_ids)} ta test mavjud"}, status=400)
 
-        selected_tests = sample(list(tests), count)
-
-        # Old not finished tests clear
-        Result.objects.filter(
-            user=request.user,
-            finished=False
-        ).delete()
+        selected_tests = active_tests.sample(count, test_ids)
 
         # Yangi Yaratish
-        result = Result.objects.create(
-            user=request.user,
-            description=f"SetTest {count} ta test",
-            test_length=count,
-            true_answers=0,
-            test_type=enums.TestChoices.SETTEST
+        result = sheets.create_result(
+            request.user, f"SetTest {count} ta test", enums.TestChoices.SETTEST, selected_tests
         )
 
-        for t in selected_tests:
-            TestSheet.objects.create(result=result, test=t)
-
-        serializer = ResultSerializer(result)
-        return Response(serializer.data, status=201)
+        return Response(flat(ResultSerializer).one(result), status=201)
 
 
     @action(detail=False, methods=['post'])
@@ -224,35 +213,38 @@ class StartTestViewSet(viewsets.ViewSet):
     def start_exam(self, request):
         """
         Exam bo'yicha test boshlash
-        Body: { "count": int = 20 }
+        Body: { "count": int = 20, "policy": "uniform" | "per_theme" | "weighted", "per_theme": int }
         """
         count = int(request.data.get("count", 20))
-        tests = Test.objects.filter(active=True)
-        if tests.count() < count:
-            return Response({"error": f"Faqat {tests.count()} ta test mavjud"}, status=400)
-
-        selected_tests = sample(list(tests), count)
+        policy = request.data.get("policy") or composition.DEFAULT_POLICY
+        description = f"Exam {count} ta test"
+
+        # Tayyor exam pooldan olish (bitta UPDATE), faqat odatiy (uniform) examlar uchun
+        blueprint = exam_pool.claim(count) if policy == composition.DEFAULT_POLICY else None
+        if blueprint is not None:
+            test_ids, orders = blueprint
+            try:
+                result = sheets.create_result(
+                    request.user, description, enums.TestChoices.EXAM, test_ids, orders=orders
+                )
+                return Response(flat(ResultSerializer).one(result), status=201)
+            except IntegrityError:
+                # Blueprint dagi test o'chirilgan bo'lsa, odatiy yo'l bilan yaratamiz
+                pass
 
-        # Old not finished tests clear
-        Result.objects.filter(
-            user=request.user,
-            finished=False
-        ).delete()
+        try:
+            selected_tests = composition.compose(
+                count, policy, per_theme=request.data.get("per_theme")
+            )
+        except composition.CompositionError as e:
+            return Response({"error": str(e)}, status=400)
 
         # Yangi Yaratish
-        result = Result.objects.create(
-            user=request.user,
-            description=f"Exam {count} ta test",
-            test_length=count,
-            true_answers=0,
-            test_type=enums.TestChoices.EXAM
+        result = sheets.create_result(
+            request.user, f"Exam {len(selected_tests)} ta test", enums.TestChoices.EXAM, selected_tests
         )
 
-        for t in selected_tests:
-            TestSheet.objects.create(result=result, test=t)
-
-        serializer = ResultSerializer(result)
-        return Response(serializer.data, status=201)
+        return Response(flat(ResultSerializer).one(result), status=201)
     
 
 
@@ -271,62 +263,22 @@ class SolveTestViewSet(viewsets.ViewSet):
         TestSheet ga variantni belgilash
         Body: { "variant_id": int }
         """
-        print(request.user)
-        testsheet = get_object_or_404(TestSheet, id=pk, result__user=request.user)
-
-        if testsheet.result.finished:
-            return Response({"error": "Test allaqachon tugatilgan", "finished": result.finished}, status=400)
-        variant_id = request.data.get("variant_id")
-        variant = get_object_or_404(Variant, id=variant_id, test=testsheet.test)
-        # 25 minut gacha javoblarni kirita olsin
-        if testsheet.result.test_type == enums.TestChoices.EXAM and testsheet.result.start_time + timedelta(minutes=25) < timezone.now():
-            result = get_object_or_404(Result, id=testsheet.result.id, user=request.user)
-            if result.finished:
-                return Response({"error": "Test allaqachon tugatilgan", "finished": result.finished}, status=400)
-
-            # To'g'ri javoblarni hisoblash
-            true_answers = TestSheet.objects.filter(result=result, successful=True).count()
-            result.true_answers = true_answers
-            result.finished = True
-            result.end_time = timezone.now()
-            result.save()
-
-            return Response({
-                "message": "Test tugatildi",
-                "result_id": result.id,
-                "true_answers": true_answers,
-                "test_length": result.test_length, "finished": True
-            })
-        if testsheet.selected == True:
-            return Response({"error": "TestSheet ga variant belgilangan"}, status=400)
-        testsheet.current_answer = variant
-        testsheet.selected = True
-        testsheet.successful = (variant == testsheet.test.correct_answer)
-        if testsheet.successful:
-            testsheet.result.true_answers += 1
-            testsheet.result.save()
-        else:
-            testsheet.result.incorrect_answers += 1
-            testsheet.result.save()
-        testsheet.save()
-        if testsheet.result.incorrect_answers == 3 and not testsheet.successful:
-            result = get_object_or_404(Result, id=testsheet.result.id, user=request.user)
-
-            # To'g'ri javoblarni hisoblash
-            true_answers = TestSheet.objects.filter(result=result, successful=True).count()
-            result.true_answers = true_answers
-            result.finished = True
-            result.end_time = timezone.now()
-            result.save()
-            return Response({
-                "error": "Test yakunlandi!", "finished": result.finished
-            })
-        return Response({
-            "message": "Javob saqlandi",
-            "testsheet_id": testsheet.id,
-            "correct_answer": VariantSerializer(testsheet.test.correct_answer).data,
-            "successful": testsheet.successful
-        })
+        submit = exam_state.submit if exam_state.enabled else answers.submit_answer
+        data, status_code = submit(request.user, pk, request.data.get("variant_id"))
+        return Response(data, status=status_code)
+
+
+    @action(detail=True, methods=['post'])
+    @user_required
+    def answers(self, request, pk=None):
+        """
+        Result ning bir nechta TestSheet lariga bitta so'rovda javob berish
+        Body: { "answers": [{ "testsheet_id": int, "variant_id": int }, ...] }
+        """
+        if exam_state.enabled:
+            exam_state.release(pk)
+        data, status_code = answers.submit_answers(request.user, pk, request.data.get("answers"))
+        return Response(data, status=status_code)
 
 
     @action(detail=True, methods=['post'])
@@ -336,20 +288,20 @@ class SolveTestViewSet(viewsets.ViewSet):
         Result ni tugatish
         """
         result = get_object_or_404(Result, id=pk, user=request.user)
-        if result.finished:
+        if result.finished or result.superseded:
             return Response({"error": "Test allaqachon tugatilgan"}, status=400)
+        if exam_state.enabled:
+            exam_state.release(result.id)
 
-        # To'g'ri javoblarni hisoblash
-        true_answers = TestSheet.objects.filter(result=result, successful=True).count()
-        result.true_answers = true_answers
-        result.finished = True
-        result.end_time = timezone.now()
-        result.save()
+        # To'g'ri javoblar bitta UPDATE ichida qayta hisoblanadi
+        if not results.finish([result.id], test_type=result.test_type):
+            return Response({"error": "Test allaqachon tugatilgan"}, status=400)
+        result.refresh_from_db(fields=['true_answers'])
 
         return Response({
             "message": "Test tugatildi",
             "result_id": result.id,
-            "true_answers": true_answers,
+            "true_answers": result.true_answers,
             "test_length": result.test_length
         })
 
@@ -379,28 +331,42 @@ class ResultStatisticsView(APIView):
 class AllResultsListView(APIView):
     @user_required
     def get(self, request):
-        if request.user.role == enums.RoleChoices.ADMIN or request.user.is_staff:
-            results = Result.objects.filter(
-                finished=True,
-                test_type=enums.TestChoices.EXAM
-            ).order_by("-end_time")[:50]
-        else:
-            results = Result.objects.filter(
-                user=request.user,
-                finished=True,
-                test_type=enums.TestChoices.EXAM
-            ).order_by("-end_time")[:20]
-        data = []
-        for result in results:
-            data.append({
-                "id": result.id,
-                "name": result.user.full_name,
-                "all": result.test_length,
-                "trues": result.true_answers,
-                "end_time": result.end_time.strftime("%H:%M:%S"),
-                "test_type": result.test_type,
-                "status": result.true_answers >= 18
-            })
+        """
+        Tugatilgan EXAM natijalari, eng yangisi birinchi.
+        Filtrlar: ?user=<id> (faqat admin), ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD, ?passed=true|false
+        Sahifalash: ?limit=N&cursor=<next_cursor>
+        """
+        params = request.query_params
+        is_admin = request.user.role == enums.RoleChoices.ADMIN or request.user.is_staff
+        try:
+            user_id = int(params['user']) if is_admin and params.get('user') else None
+            limit = int(params['limit']) if params.get('limit') else (50 if is_admin else 20)
+        except ValueError:
+            return Response({"error": "user va limit butun son bo'lishi kerak"}, status=400)
+        if not is_admin:
+            user_id = request.user.id
+        max_limit = getattr(settings, 'RESULTS_FEED_MAX_LIMIT', 200)
+        if not 0 < limit <= max_limit:
+            return Response({"error": f"limit 1..{max_limit} oralig'ida bo'lishi kerak"}, status=400)
+
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                try:
+                    dates[name] = parse_date(params[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    return Response({"error": f"{name} YYYY-MM-DD formatida bo'lishi kerak"}, status=400)
+        passed = {'true': True, '1': True, 'false': False, '0': False}.get(params.get('passed', '').lower())
+
+        try:
+            rows, next_cursor = feed.page(feed.results(user_id, passed=passed, **dates), limit, params.get('cursor'))
+        except feed.FeedError as exc:
+            return Response({"error": str(exc)}, status=400)
+        data = [feed.item(row) for row in rows]
+        if 'limit' in params or 'cursor' in params:
+            return Response({"results": data, "next_cursor": next_cursor})
         return Response(data)
 
 # api/views/user_apis.py
@@ -421,57 +387,54 @@ class SolveTestDetailView(APIView):
     
     @user_required
     def get(self, request, result_id):
-        # 1. N+1 muammosini hal qilish: Faqat bitta so'rovda Test va Variantlarni oldindan yuklash
-        testsheets_qs = TestSheet.objects.filter(
-            result__id=result_id, 
-            result__user=request.user
-        ).select_related(
-            'test',  # Test ob'ektini yuklaydi
-            'current_answer', # Current Answer (Agar Modelda ForeignKey bo'lsa)
-            'test__correct_answer' # Correct Answer (Agar Modelda ForeignKey bo'lsa)
-        ).prefetch_related(
-            Prefetch('test__variant_set', queryset=Variant.objects.all()) 
-            # Testga tegishli barcha variantlarni bir so'rovda yuklaydi
-        ).all()
-        
-        data = []
-
-        # 2. Loop ichidagi DB so'rovlarini olib tashlash
-        for ts in testsheets_qs:
-            # Variantlarni oldindan yuklangan to'plamdan olish
-            variants = list(ts.test.variant_set.all())
-            
-            # Agar variant_orders bo'sh bo'lsa (yoki yangi variantlar qo'shilgan bo'lsa):
-            # Bu qism mantiqi GET dan POST/PATCH metodiga o'tkazilishi tavsiya etiladi!
-            # Agar shunday qolishi kerak bo'lsa, 'update_fields' dan foydalaning va save() ni loopdan tashqarida qiling:
-            
-            # Mantiqiy xatoni tuzatish: variant_orders ni faqat kerak bo'lsa yangilash
-            variant_ids_in_db = {v.id for v in variants}
-            
-            # Agar mavjud bo'lmasa yoki eskirgan bo'lsa, yangilash logikasi (POST/PATCH uchun yaxshiroq)
-            if not ts.variant_orders or set(ts.variant_orders) != variant_ids_in_db:
-                ts.variant_orders = list(variant_ids_in_db)
-                random.shuffle(ts.variant_orders)
-                # Barcha o'zgarishlarni to'plab, loopdan keyin saqlash afzal
-                ts.save() # Qolgan kodni to'liq ko'rmaganim uchun shu yerda qoldirildi, lekin buni optimallashtirish kerak.
-
-            # Variant tartibini olish:
-            variant_map = {v.id: v for v in variants}
-            # variant_orders bo'yicha to'g'ri tartiblash
-            variant_new_order = [variant_map[id] for id in ts.variant_orders if id in variant_map]
-
-            data.append({
-                "id": ts.id,
-                "value": ts.test.value,
-                "status": ts.successful,
-                # Rasm: .name tekshiruvi qo'shildi
-                "image": request.build_absolute_uri(ts.test.image.url) if ts.test.image and ts.test.image.name else None,
-                "current_answer": VariantSerializer(ts.current_answer).data if ts.current_answer else None,
-                "correct_answer": VariantSerializer(ts.test.correct_answer).data if (ts.result.finished or ts.current_answer) else None,
-                "variants": VariantSerializer(variant_new_order, many=True).data
-            })
-        
-        return Response(data)
+        """
+        Result ning TestSheet lari (faqat o'qiydi, hech narsa yozmaydi).
+        ETag javoblar holatidan olinadi: o'zgarish bo'lmasa 304 qaytadi.
+        Query: ?limit=N&cursor=<oxirgi sheet id> - sahifalash, ?stream=1 - oqimli JSON
+        """
+        # Xotirada tasdiqlangan, hali yozilmagan javoblar (EXAM_STATE_ENABLED) avval bazaga
+        exam_state.sync(result_id)
+        result = Result.objects.filter(id=result_id, user=request.user).values(
+            'id', 'finished', 'true_answers', 'incorrect_answers', 'end_time'
+        ).first()
+        if result is None:
+            return Response([])
+
+        etag = make_etag(
+            result['id'], result['finished'], result['true_answers'], result['incorrect_answers'],
+            result['end_time'], versions.get_version(test_index.VERSION_NAME),
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        # build_absolute_uri har bir rasm uchun emas, bir marta
+        base_uri = request.build_absolute_uri('/')[:-1]
+        params = request.query_params
+        try:
+            after = int(params['cursor']) if params.get('cursor') else None
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return Response({"error": "cursor va limit butun son bo'lishi kerak"}, status=400)
+        max_limit = getattr(settings, 'SHEET_DETAIL_MAX_LIMIT', 200)
+        if limit is not None and not 0 < limit <= max_limit:
+            return Response({"error": f"limit 1..{max_limit} oralig'ida bo'lishi kerak"}, status=400)
+
+        if params.get('stream') in ('1', 'true'):
+            # Katta mavzular: xotira sheetlar soniga bog'liq emas
+            items = sheet_detail.iter_items(result['id'], result['finished'], base_uri, after)
+            response = StreamingHttpResponse(sheet_detail.stream_json(items), content_type='application/json')
+        elif limit is not None:
+            data, next_cursor = sheet_detail.page(result['id'], result['finished'], base_uri, limit, after)
+            response = Response({"results": data, "next_cursor": next_cursor})
+        else:
+            data = sheet_detail.render(list(sheet_detail.sheet_rows(result['id'], after)), result['finished'], base_uri)
+            response = Response(data)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 # views.py
 from rest_framework.views import APIView
@@ -484,25 +447,5 @@ class UserStatisticsView(APIView):
     """
     @user_required
     def get(self, request):
-        user = request.user
-        results = Result.objects.filter(test_type=enums.TestChoices.EXAM, user=user)
-
-        total_tests = results.count()
-        total_correct = sum(r.true_answers for r in results)
-        total_incorrect = sum(r.incorrect_answers for r in results)
-        total_questions = total_correct + total_incorrect
-        avg_score = round(sum(r.true_answers for r in results) / total_tests) if total_tests > 0 else 0
-        avg_percent = round((total_correct / total_questions) * 100, 1) if total_questions > 0 else 0
-        best_score = max([r.true_answers for r in results], default=0)
-
-        data = {
-            "total_tests": total_tests,
-            "total_correct": total_correct,
-            "total_incorrect": total_incorrect,
-            "total_questions": total_questions,
-            "average_score": avg_score,
-            "average_percent": avg_percent,
-            "best_score": best_score,
-        }
-
+        data = stats.for_user(request.user.id)
         return Response(data)
@@ -95,6 +95,23 @@ DATABASES = {
     }
 }
 
+# Cache barcha worker processlar uchun umumiy bo'lishi kerak (versiyalar, api/services/versions.py).
+# REDIS_URL berilsa Redis (redis paketi kerak), aks holda bazadagi jadval (0020 migration yaratadi)
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'api_cache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -174,4 +191,98 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10 MB = 10 * 1024 * 1024
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
 
 # Agar katta hajmdagi ma'lumotlar yuborilsa, so'rov darajasidagi xatolardan qochish uchun
-# Agar fayl 10 MB dan oshsa, bu xato beriladi.
\ No newline at end of file
+# Agar fayl 10 MB dan oshsa, bu xato beriladi.
+
+# Token sessiyalar keshi (api/services/session_cache.py); bekor qilish boshqa
+# workerlarga 'sessions' versiyasi orqali VERSION_CHECK_INTERVAL ichida yetadi
+SESSION_CACHE_ENABLED = True
+SESSION_CACHE_TTL = 60  # sekund
+SESSION_CACHE_MAX_SIZE = 10000
+
+# Sessiya "last seen" (updated_at) yozuvlari yig'ilib, bitta UPDATE bilan yoziladi
+SESSION_ACTIVITY_FLUSH_INTERVAL = 30  # sekund (fon job ham shu oraliqda yozadi)
+SESSION_ACTIVITY_FLUSH_THRESHOLD = 500
+
+# Login: parol bir marta tekshiriladi, sessiya user bilan birga yuklanadi
+AUTHENTICATION_BACKENDS = ['api.backends.LoginBackend']
+
+# PBKDF2 iteratsiyalari o'zgarsa, hash keyingi loginda avtomatik yangilanadi
+PASSWORD_PBKDF2_ITERATIONS = 1_000_000
+PASSWORD_HASHERS = [
+    'api.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Token rejimi: 'session' (uuid, UserSession orqali) yoki 'signed' (HMAC imzoli, bazasiz tekshiriladi)
+AUTH_TOKEN_MODE = 'session'
+SIGNED_TOKEN_MAX_AGE = None  # sekund, None - muddatsiz
+SIGNED_TOKEN_GENERATION_REFRESH = 5  # SessionGeneration jadvalini qayta o'qish oralig'i (sekund)
+SIGNED_TOKEN_GENERATION_OVERLAP = 60  # kech commit bo'lgan bump lar uchun qayta o'qiladigan oyna (sekund)
+
+# Aktiv testlar indeksi (api/services/test_index.py) necha sekundda bir qayta quriladi
+ACTIVE_TEST_INDEX_MAX_AGE = 60
+
+# Versiyalar (api/services/versions.py) umumiy keshdan necha sekundda bir qayta o'qiladi:
+# boshqa workerdagi admin o'zgarishi eng ko'pi bilan shuncha kechikib ko'rinadi
+VERSION_CHECK_INTERVAL = 1
+
+# Oldindan tayyorlangan examlar pooli (api/services/exam_pool.py)
+EXAM_POOL_ENABLED = False
+EXAM_POOL_COUNT = 20  # pool faqat shu uzunlikdagi examlar uchun ishlaydi
+EXAM_POOL_SIZE = 200
+EXAM_POOL_REFILL_THRESHOLD = 50
+EXAM_POOL_INVALIDATE_ON_CHANGE = True  # savollar bazasi o'zgarsa, eski blueprintlar o'chiriladi
+
+# Tashlab ketilgan (superseded / eskirgan) tugatilmagan natijalarni tozalash
+RESULT_REAPER_INTERVAL = None  # sekund; None - faqat `manage.py reap_results` orqali
+RESULT_REAPER_BATCH_SIZE = 500
+RESULT_REAPER_STALE_HOURS = 24
+
+# solve_tests/{id}/answers/ da bitta so'rovdagi javoblar soni chegarasi
+ANSWER_BATCH_MAX_ITEMS = 100
+
+# Write-behind javoblar buferi (api/services/exam_state.py); faqat bitta worker process bilan yoqing
+EXAM_STATE_ENABLED = False
+EXAM_STATE_LOG = BASE_DIR / 'exam_state.log'  # crash dan keyin tiklash uchun; None - faqat xotirada
+EXAM_STATE_FSYNC = False  # har bir javobdan keyin os.fsync (sekinroq, lekin OS crash ga ham chidamli)
+EXAM_STATE_FLUSH_INTERVAL = 2  # sekund
+EXAM_STATE_FLUSH_THRESHOLD = 200
+
+# Muddati (25 minut) o'tgan examlarni yakunlash (api/services/deadlines.py)
+EXAM_DEADLINE_INTERVAL = None  # eng uzoq kutish, sekund; None - faqat `manage.py finalize_exams` orqali
+EXAM_DEADLINE_BATCH_SIZE = 500
+
+# Savollar matni/variantlari keshi (api/services/question_cache.py), savollar bazasi versiyasi bilan
+QUESTION_CACHE_ENABLED = True
+QUESTION_CACHE_MAX_SIZE = 20000  # shundan oshsa kesh tozalanadi
+
+# result/<id>/tests/?limit=N sahifa hajmi chegarasi
+SHEET_DETAIL_MAX_LIMIT = 200
+
+# admin/all_users_stats/?limit=K sahifa hajmi chegarasi
+LEADERBOARD_MAX_LIMIT = 200
+
+# results/?limit=N sahifa hajmi chegarasi
+RESULTS_FEED_MAX_LIMIT = 200
+
+# Savollar bo'yicha javoblar statistikasi (api/services/question_stats.py), hisoblagichlar yig'ilib yoziladi
+QUESTION_STATS_ENABLED = True
+QUESTION_STATS_FLUSH_INTERVAL = 30  # sekund
+QUESTION_STATS_FLUSH_THRESHOLD = 1000
+QUESTION_STATS_MIN_ANSWERS = 5  # "eng qiyin savollar" ro'yxatiga kirish uchun kamida shuncha javob
+QUESTION_STATS_MAX_LIMIT = 200
+
+# Kunlik / soatlik exam faolligi (api/services/rollups.py), hisoblagichlar yig'ilib yoziladi
+EXAM_ACTIVITY_ENABLED = True
+EXAM_ACTIVITY_FLUSH_INTERVAL = 30  # sekund
+EXAM_ACTIVITY_FLUSH_THRESHOLD = 500
+EXAM_ACTIVITY_MAX_BUCKETS = 1000  # admin/exam_activity/ bitta javobdagi oraliqlar soni chegarasi
+
+# Admin dashboard hisoblagichlari (api/services/dashboard.py) bazadan qayta sanash oralig'i (bitta worker sanaydi)
+DASHBOARD_RECONCILE_INTERVAL = 300  # sekund; None - faqat signallar
+
+# Mavzu / bilet katalogi (api/services/catalog.py) uchun Cache-Control max-age
+CATALOG_MAX_AGE = 0  # sekund; 0 - har safar ETag bilan tekshiriladi (no-cache)